@@ -2,143 +2,203 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import os
-import sqlite3
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
-import urllib.parse
-from typing import List, Literal
+import hashlib
+import json
+import math
+import time
+from banco_de_dados import BancoDeDados
+from catalogo import CourseType, MAPA_CATEGORIAS
+from cliente_busca import ClienteBusca
+from metricas import COMANDO_SEGUNDOS, ServidorMetricas, medir_comando
+from ranking import RankingCursos
+from typing import AsyncIterator, Dict, List, Optional
 
 # --- CONFIGURAÇÕES ---
 TOKEN = os.getenv("DISCORD_TOKEN", "")
 DB_FILE = "cursos_usuarios.db"
-CourseType = Literal["free", "paid", "all"]
-
-# --- LISTA DE SITES E CATEGORIAS (Internalizada) ---
-SITES_DE_BUSCA = {
-    "Udemy": {"url": "https://www.udemy.com/courses/search/?q={}&sort=relevance", "base": "https://www.udemy.com", "filter": "/course/", "type": "mixed"},
-    "Coursera": {"url": "https://www.coursera.org/search?query={}", "base": "https://www.coursera.org", "filter": "/learn/", "type": "mixed"},
-    "edX": {"url": "https://www.edx.org/search?q={}", "base": "https://www.edx.org", "filter": "/course/", "type": "mixed"},
-    "Digital Innovation One": {"url": "https://www.dio.me/browse?search={}", "base": "https://www.dio.me", "filter": "/curso/", "type": "free"},
-    "Fund. Bradesco Escola Virtual": {"url": "https://www.ev.org.br/catalogo-de-cursos?query={}", "base": "https://www.ev.org.br", "filter": "/curso/", "type": "free"},
-    "Udacity": {"url": "https://www.udacity.com/courses/all?search={}", "base": "https://www.udacity.com", "filter": "/course/", "type": "mixed"},
-    "Alison": {"url": "https://alison.com/courses?query={}&category=it", "base": "https://alison.com", "filter": "/course/", "type": "free"},
-    "Khan Academy": {"url": "https://www.khanacademy.org/search?page_search_query={}", "base": "https://www.khanacademy.org", "filter": "/x/", "type": "free"},
-    "freeCodeCamp": {"url": "https://www.freecodecamp.org/news/search?query={}", "base": "https://www.freecodecamp.org/news", "filter": "/", "type": "free"},
-    "Alura": {"url": "https://www.alura.com.br/busca?query={}", "base": "https://www.alura.com.br", "filter": "/curso/", "type": "paid"},
-    "DataCamp": {"url": "https://www.datacamp.com/search?q={}", "base": "https://www.datacamp.com", "filter": "/courses/", "type": "paid"},
-    "Pluralsight": {"url": "https://www.pluralsight.com/search?q={}", "base": "https://www.pluralsight.com", "filter": "/courses/", "type": "paid"},
-    "Class Central": {"url": "https://www.classcentral.com/search?q={}", "base": "https://www.classcentral.com", "filter": "/course/", "type": "mixed"},
-}
-SITES_PENTEST = {
-    "HackerSec": {"url": "https://hackersec.com/cursos-gratuitos/", "base": "https://hackersec.com", "filter": "/curso/", "type": "free"},
-    "Cybrary": {"url": "https://www.cybrary.it/catalog/all/", "base": "https://www.cybrary.it", "filter": "/course/", "type": "mixed"},
-    "Hack The Box Academy": {"url": "https://academy.hackthebox.com/catalogue", "base": "https://academy.hackthebox.com", "filter": "/module/", "type": "mixed"},
-}
-MAPA_CATEGORIAS = {
-    "programacao": (["programação", "python", "javascript", "java"], "💻 Cursos de Programação"),
-    "redes": (["redes de computadores", "ccna", "infraestrutura"], "🌐 Cursos de Redes"),
-    "cloud": (["aws", "azure", "google cloud"], "☁️ Cursos de Cloud"),
-    "seguranca": (["segurança da informação", "pentest", "hacking etico"], "🛡️ Cursos de Segurança"),
-    "dados": (["sql", "banco de dados", "nosql"], "🗄️ Cursos de Banco de Dados"),
-    "ciencia_dados": (["ciencia de dados", "machine learning", "ia"], "📊 Cursos de Ciência de Dados"),
-    "devops": (["devops", "docker", "kubernetes"], "⚙️ Cursos de DevOps"),
-}
+BUSCA_PRAZO_GLOBAL = float(os.getenv("ITBOOST_BUSCA_PRAZO", "12"))
+BUSCA_INTERVALO_EDICAO = float(os.getenv("ITBOOST_BUSCA_INTERVALO_EDICAO", "1.0"))
+RESULTADOS_POR_PAGINA = 10
+METRICAS_HOST = os.getenv("ITBOOST_METRICAS_HOST", "127.0.0.1")
+METRICAS_PORTA = int(os.getenv("ITBOOST_METRICAS_PORTA", "9101"))  # 0 desliga o endpoint /metrics
+FORCAR_SYNC = os.getenv("ITBOOST_FORCAR_SYNC", "0") == "1"
+# Sharding do gateway: vazio desliga; "auto" usa o número recomendado pelo Discord; um número fixa o total.
+SHARDS = os.getenv("ITBOOST_SHARDS", "")
+# Shards atendidos por este processo ("0,1"); vazio atende todos. Ver implantacao.py.
+SHARD_IDS = [int(shard) for shard in os.getenv("ITBOOST_SHARD_IDS", "").split(",") if shard.strip()]
+
+# --- SERVIÇO DE BUSCA ---
+# O scraping, o cache e o índice local rodam em servico_busca.py, compartilhado com o
+# bot do Telegram; aqui só consumimos os resultados conforme chegam.
+cliente_busca = ClienteBusca()
 
 # --- CONFIGURAÇÃO DO BOT ---
-intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
+servidor_metricas = ServidorMetricas(METRICAS_HOST, METRICAS_PORTA)
 
-# --- WEB SCRAPING OTIMIZADO (Async) ---
-async def _fetch_page(session: aiohttp.ClientSession, url: str) -> str:
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-    try:
-        async with session.get(url, headers=headers, timeout=15) as response:
-            response.raise_for_status()
-            return await response.text()
-    except Exception:
-        return ""
-
-def _parse_courses(html: str, base_url: str, filter_keyword: str) -> List[tuple[str, str]]:
-    cursos = []
-    soup = BeautifulSoup(html, "html.parser")
-    for a in soup.find_all("a", href=True):
-        href = a['href']
-        if filter_keyword in href:
-            link = href if href.startswith("http") else urllib.parse.urljoin(base_url, href)
-            title = a.get_text(strip=True) or (a.find('img') and a.find('img').get('alt', '').strip())
-            if not title or len(title) < 5:
-                title = link.split('/')[-1].split('?')[0].replace('-', ' ').replace('_', ' ').title()
-            if title:
-                cursos.append((title.strip(), link))
-    return list(dict.fromkeys(cursos))
-
-async def _scrape_site(session: aiohttp.ClientSession, url_template: str, base_url: str, filter_keyword: str) -> List[tuple[str, str]]:
-    html = await _fetch_page(session, url_template)
-    if html:
-        return _parse_courses(html, base_url, filter_keyword)
-    return []
-
-async def pesquisar_cursos_online(termo: str, course_type: CourseType = "all") -> List[tuple[str, str]]:
-    termo_formatado = urllib.parse.quote_plus(termo)
-    sites_filtrados = {
-        name: data for name, data in SITES_DE_BUSCA.items()
-        if course_type == "all" or data['type'] == course_type or data['type'] == 'mixed'
-    }
-    async with aiohttp.ClientSession() as session:
-        tasks = [
-            _scrape_site(session, data['url'].format(termo_formatado), data['base'], data['filter'])
-            for data in sites_filtrados.values()
-        ]
-        resultados_por_site = await asyncio.gather(*tasks)
-    return [curso for sublist in resultados_por_site for curso in sublist]
-
-async def pesquisar_cursos_pentest(course_type: CourseType = "all") -> List[tuple[str, str]]:
-    sites_filtrados = {
-        name: data for name, data in SITES_PENTEST.items()
-        if course_type == "all" or data['type'] == course_type or data['type'] == 'mixed'
-    }
-    async with aiohttp.ClientSession() as session:
-        tasks = [
-            _scrape_site(session, data['url'].format(''), data['base'], data['filter'])
-            for data in sites_filtrados.values()
-        ]
-        resultados_por_site = await asyncio.gather(*tasks)
-    return [curso for sublist in resultados_por_site for curso in sublist]
+class ArvoreComandos(app_commands.CommandTree):
+    """CommandTree que mede a duração de cada slash command, com ou sem erro."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._inicios: Dict[int, float] = {}
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        self._inicios[interaction.id] = time.perf_counter()
+        return True
+
+    def registrar_fim(self, interaction: discord.Interaction, resultado: str):
+        inicio = self._inicios.pop(interaction.id, None)
+        if inicio is not None and interaction.command is not None:
+            COMANDO_SEGUNDOS.observar(time.perf_counter() - inicio, "discord", interaction.command.name, resultado)
 
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        self.registrar_fim(interaction, "erro")
+        await super().on_error(interaction, error)
+
+    def impressao_digital(self) -> str:
+        """Hash do payload que sync() enviaria para os comandos globais."""
+        payload = sorted((comando.to_dict(self) for comando in self.get_commands()), key=lambda comando: comando["name"])
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def _opcoes_sharding() -> Dict[str, object]:
+    if not SHARDS:
+        return {}
+    if SHARD_IDS and SHARDS == "auto":
+        raise ValueError("ITBOOST_SHARD_IDS exige o total de shards em ITBOOST_SHARDS (não 'auto').")
+    opcoes: Dict[str, object] = {"shard_count": None if SHARDS == "auto" else int(SHARDS)}
+    if SHARD_IDS:
+        opcoes["shard_ids"] = SHARD_IDS
+    return opcoes
+
+# Com sharding, um AutoShardedBot mantém uma conexão de gateway por shard no mesmo event loop.
+class ITBoostBot(commands.AutoShardedBot if SHARDS else commands.Bot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tarefa_metricas: Optional[asyncio.Task] = None
+
+    async def setup_hook(self):
+        # Roda uma vez por processo, depois do login e antes do gateway. on_ready, ao
+        # contrário, dispara de novo a cada reconexão e não deve fazer trabalho pesado.
+        self.add_dynamic_items(BotaoPaginaResultados, SelecionarCursoParaSalvar)
+        await banco.iniciar()
+        # Os comandos são globais: com vários processos, só quem atende o shard 0 sincroniza.
+        shard_ids = getattr(self, "shard_ids", None)
+        if shard_ids is None or 0 in shard_ids:
+            await self.sincronizar_comandos()
+        if METRICAS_PORTA:
+            # Em paralelo com a conexão ao gateway: o endpoint não precisa atrasar a primeira interação.
+            self._tarefa_metricas = asyncio.create_task(servidor_metricas.iniciar())
+
+    async def sincronizar_comandos(self):
+        """Sincroniza a árvore de comandos só quando ela mudou desde a última sincronização.
+
+        A impressão digital do payload fica na tabela de metadados do banco, por
+        aplicação; ITBOOST_FORCAR_SYNC=1 sincroniza mesmo sem mudança.
+        """
+        chave = f"discord_comandos:{self.application_id}"
+        impressao = self.tree.impressao_digital()
+        if not FORCAR_SYNC and await banco.obter_metadado(chave) == impressao:
+            print("Comandos inalterados desde a última sincronização.")
+            return
+        try:
+            synced = await self.tree.sync()
+        except Exception as e:
+            print(f"Erro ao sincronizar comandos: {e}")
+            return
+        await banco.gravar_metadado(chave, impressao)
+        print(f"Sincronizados {len(synced)} comandos.")
+
+    async def close(self):
+        if self._tarefa_metricas is not None:
+            await asyncio.gather(self._tarefa_metricas, return_exceptions=True)
+        await servidor_metricas.encerrar()
+        await cliente_busca.fechar()
+        await banco.fechar()
+        await super().close()
+
+intents = discord.Intents.default()
+bot = ITBoostBot(command_prefix="!", intents=intents, tree_cls=ArvoreComandos, **_opcoes_sharding())
 
 # --- BANCO DE DADOS ---
-def iniciar_banco_de_dados():
-    with sqlite3.connect(DB_FILE) as conexao:
-        cursor = conexao.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inscricoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
-                course_title TEXT NOT NULL, course_url TEXT NOT NULL,
-                UNIQUE(user_id, course_url)
-            )
-        ''')
+banco = BancoDeDados(DB_FILE)
 
 # --- COMPONENTES DE UI (VIEWS E BOTÕES) ---
-class CursoView(discord.ui.View):
-    def __init__(self, course_title: str, course_url: str):
-        super().__init__(timeout=None)
-        self.course_title = course_title
-        self.course_url = course_url
+# Os controles do navegador de resultados usam custom_ids persistentes que carregam
+# o id da busca salva no banco, então continuam funcionando depois de um restart.
+class BotaoPaginaResultados(discord.ui.DynamicItem[discord.ui.Button], template=r"itb:pg:(?P<busca>[0-9]+):(?P<pagina>[0-9]+):(?P<direcao>[ap])"):
+    def __init__(self, busca_id: int, pagina: int, direcao: str, disabled: bool = False):
+        self.busca_id = busca_id
+        self.pagina = pagina
+        super().__init__(discord.ui.Button(
+            label="◀ Anterior" if direcao == "a" else "Próxima ▶",
+            style=discord.ButtonStyle.secondary,
+            custom_id=f"itb:pg:{busca_id}:{pagina}:{direcao}",
+            disabled=disabled,
+            row=1,
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(int(match["busca"]), int(match["pagina"]), match["direcao"])
 
-    @discord.ui.button(label="✅ Salvar na minha lista", style=discord.ButtonStyle.success)
-    async def inscrever_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_id = interaction.user.id
+    @medir_comando("discord", "pagina_resultados")
+    async def callback(self, interaction: discord.Interaction):
+        await _mostrar_pagina_resultados(interaction, self.busca_id, self.pagina)
+
+class SelecionarCursoParaSalvar(discord.ui.DynamicItem[discord.ui.Select], template=r"itb:sv:(?P<busca>[0-9]+):(?P<pagina>[0-9]+)"):
+    def __init__(self, busca_id: int, pagina: int, opcoes: List[discord.SelectOption]):
+        self.busca_id = busca_id
+        super().__init__(discord.ui.Select(
+            placeholder="✅ Salvar um curso desta página na minha lista...",
+            custom_id=f"itb:sv:{busca_id}:{pagina}",
+            options=opcoes,
+            row=0,
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match):
+        return cls(int(match["busca"]), int(match["pagina"]), item.options)
+
+    @medir_comando("discord", "salvar_curso")
+    async def callback(self, interaction: discord.Interaction):
+        curso = await banco.obter_resultado_busca(self.busca_id, int(self.item.values[0]))
+        if curso is None:
+            await interaction.response.send_message("Esta busca expirou. Faça a pesquisa novamente.", ephemeral=True)
+            return
+        course_title, course_url = curso
         try:
-            with sqlite3.connect(DB_FILE) as conexao:
-                cursor = conexao.cursor()
-                cursor.execute("INSERT INTO inscricoes (user_id, course_title, course_url) VALUES (?, ?, ?)",
-                               (user_id, self.course_title, self.course_url))
-            await interaction.response.send_message(f"Você salvou o curso: '{self.course_title}'!", ephemeral=True)
-        except sqlite3.IntegrityError:
-            await interaction.response.send_message("Você já salvou este curso!", ephemeral=True)
-        except Exception as e:
+            inserido = await banco.salvar_inscricao(interaction.user.id, course_title, course_url)
+        except Exception:
             await interaction.response.send_message("Ocorreu um erro ao salvar.", ephemeral=True)
+            return
+        if inserido:
+            await interaction.response.send_message(f"Você salvou o curso: '{course_title}'!", ephemeral=True)
+        else:
+            await interaction.response.send_message("Você já salvou este curso!", ephemeral=True)
+
+def _montar_view_resultados(busca_id: int, pagina: int, total: int, itens: List[tuple[int, str, str]]) -> discord.ui.View:
+    total_paginas = max(1, math.ceil(total / RESULTADOS_POR_PAGINA))
+    opcoes = [
+        discord.SelectOption(label=f"{posicao + 1}. {titulo}"[:100], value=str(posicao))
+        for posicao, titulo, _ in itens
+    ]
+    view = discord.ui.View(timeout=None)
+    view.add_item(SelecionarCursoParaSalvar(busca_id, pagina, opcoes))
+    view.add_item(BotaoPaginaResultados(busca_id, max(0, pagina - 1), "a", disabled=pagina == 0))
+    view.add_item(BotaoPaginaResultados(busca_id, min(total_paginas - 1, pagina + 1), "p", disabled=pagina >= total_paginas - 1))
+    return view
+
+async def _mostrar_pagina_resultados(interaction: discord.Interaction, busca_id: int, pagina: int):
+    dados = await banco.obter_pagina_busca(busca_id, pagina * RESULTADOS_POR_PAGINA, RESULTADOS_POR_PAGINA)
+    if dados is None or not dados[2]:
+        await interaction.response.send_message("Esta busca expirou. Faça a pesquisa novamente.", ephemeral=True)
+        return
+    titulo_header, total, itens = dados
+    await interaction.response.edit_message(
+        embed=_montar_embed_resultados(titulo_header, itens, pagina, total),
+        view=_montar_view_resultados(busca_id, pagina, total, itens),
+    )
 
 class CategoriaSelect(discord.ui.Select):
     def __init__(self, course_type: CourseType):
@@ -154,6 +214,7 @@ class CategoriaSelect(discord.ui.Select):
         ]
         super().__init__(placeholder="Escolha uma área de TI para explorar...", options=options)
 
+    @medir_comando("discord", "categoria")
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer(thinking=True, ephemeral=True)
         categoria_key = self.values[0]
@@ -162,51 +223,110 @@ class CategoriaSelect(discord.ui.Select):
         tipo_texto = "Pagos" if self.course_type == "paid" else "Gratuitos"
         titulo_header = f"{titulo_header_base} ({tipo_texto})"
 
-        tasks = []
-        if categoria_key == "seguranca":
-            tasks.append(pesquisar_cursos_pentest(course_type=self.course_type))
-
-        for termo in termos_de_busca:
-            tasks.append(pesquisar_cursos_online(termo, course_type=self.course_type))
-
-        resultados_listas = await asyncio.gather(*tasks)
-        resultados_finais = list(dict.fromkeys([item for sublist in resultados_listas for item in sublist]))
-
-        await _enviar_resultados_para_discord(interaction, resultados_finais, titulo_header)
+        resultados = cliente_busca.pesquisar_stream(
+            termos_de_busca, course_type=self.course_type, incluir_pentest=categoria_key == "seguranca"
+        )
+        await _enviar_resultados_para_discord(interaction, resultados, termos_de_busca, titulo_header)
 
 class CategoriaTIView(discord.ui.View):
     def __init__(self, course_type: CourseType):
         super().__init__(timeout=None)
         self.add_item(CategoriaSelect(course_type))
 
-async def _enviar_resultados_para_discord(interaction: discord.Interaction, cursos: List, titulo_header: str):
-    if not cursos:
-        await interaction.followup.send(f"Nenhum curso encontrado para '{titulo_header}'.", ephemeral=True)
-        return
+def _montar_embed_resultados(titulo_header: str, itens: List[tuple[int, str, str]], pagina: int, total: int, situacao: str = "") -> discord.Embed:
+    lista_formatada = "\n".join(f"{posicao + 1}. **[{titulo[:75]}]({url})**" for posicao, titulo, url in itens)
+    embed = discord.Embed(title=titulo_header, description=lista_formatada, color=discord.Color.blue())
+    rodape = f"Página {pagina + 1}/{max(1, math.ceil(total / RESULTADOS_POR_PAGINA))} · {total} resultados"
+    embed.set_footer(text=f"{rodape} · {situacao}" if situacao else rodape)
+    return embed
 
-    resultados_limitados = cursos[:10]
-    lista_formatada = "\n".join(f"{i}. **[{c[0][:75]}]({c[1]})**" for i, c in enumerate(resultados_limitados, 1))
+def _primeira_pagina(cursos: List[tuple[str, str]]) -> List[tuple[int, str, str]]:
+    return [(posicao, titulo, url) for posicao, (titulo, url) in enumerate(cursos[:RESULTADOS_POR_PAGINA])]
 
-    embed = discord.Embed(title=titulo_header, description=lista_formatada, color=discord.Color.blue())
-    embed.set_footer(text=f"Mostrando {len(resultados_limitados)} de {len(cursos)} resultados.")
-    await interaction.followup.send(embed=embed, ephemeral=True)
+async def _enviar_resultados_para_discord(interaction: discord.Interaction, resultados: AsyncIterator[tuple[str, List[tuple[str, str]]]], termos: List[str], titulo_header: str, prazo: float = BUSCA_PRAZO_GLOBAL):
+    """Publica os resultados conforme os sites respondem, editando a mesma mensagem.
 
-    for titulo, url in resultados_limitados:
-        embed_curso = discord.Embed(title=titulo, url=url, description="Clique abaixo para salvar este curso.", color=discord.Color.blue())
-        view_curso = CursoView(course_title=titulo, course_url=url)
-        await interaction.followup.send(embed=embed_curso, view=view_curso, ephemeral=True)
+    Os cursos passam por um ranking top-k contra os termos da busca. A primeira
+    mensagem sai com o primeiro site que trouxer cursos; depois disso ela é
+    reeditada, no máximo a cada BUSCA_INTERVALO_EDICAO segundos, quando a
+    primeira página do ranking muda. Ao fim do prazo global a busca é encerrada
+    com o que já chegou: o top-k é salvo no banco e a mensagem ganha o navegador
+    paginado.
+    """
+    loop = asyncio.get_running_loop()
+    fim_do_prazo = loop.time() + prazo
+    ranking = RankingCursos(termos)
+    cursos: List[tuple[str, str]] = []
+    pagina_exibida: List[tuple[int, str, str]] = []
+    sites_respondidos = 0
+    mensagem: Optional[discord.WebhookMessage] = None
+    ultima_edicao = 0.0
+    situacao_final = "busca concluída"
+    iterador = resultados.__aiter__()
+    try:
+        while True:
+            restante = fim_do_prazo - loop.time()
+            if restante <= 0:
+                situacao_final = "prazo esgotado, resultados parciais"
+                break
+            try:
+                site, cursos_site = await asyncio.wait_for(iterador.__anext__(), restante)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                situacao_final = "prazo esgotado, resultados parciais"
+                break
+            except Exception as e:
+                # Com o que já chegou a busca ainda termina; sem isso o usuário ficaria no "pensando...".
+                print(f"Erro na busca '{titulo_header}': {e!r}")
+                situacao_final = "falha na busca, resultados parciais"
+                break
+            sites_respondidos += 1
+            if not ranking.adicionar(site, cursos_site):
+                continue
+            cursos = ranking.resultados()
+            pagina = _primeira_pagina(cursos)
+            situacao = f"{sites_respondidos} sites · buscando..."
+            if mensagem is None:
+                mensagem = await interaction.followup.send(
+                    embed=_montar_embed_resultados(titulo_header, pagina, 0, len(cursos), situacao), ephemeral=True, wait=True
+                )
+                pagina_exibida, ultima_edicao = pagina, loop.time()
+            elif loop.time() - ultima_edicao >= BUSCA_INTERVALO_EDICAO and pagina != pagina_exibida:
+                # Só vale a pena editar quando a primeira página do ranking mudou.
+                await mensagem.edit(embed=_montar_embed_resultados(titulo_header, pagina, 0, len(cursos), situacao))
+                pagina_exibida, ultima_edicao = pagina, loop.time()
+    finally:
+        await iterador.aclose()
+
+    if not cursos:
+        await interaction.followup.send(f"Nenhum curso encontrado para '{titulo_header}'.", ephemeral=True)
+        return
+    itens = _primeira_pagina(cursos)
+    embed = _montar_embed_resultados(titulo_header, itens, 0, len(cursos), f"{sites_respondidos} sites · {situacao_final}")
+    try:
+        busca_id = await banco.salvar_busca(titulo_header, cursos)
+    except Exception as e:
+        print(f"Erro ao salvar resultados da busca: {e}")
+        await mensagem.edit(embed=embed)
+        return
+    await mensagem.edit(embed=embed, view=_montar_view_resultados(busca_id, 0, len(cursos), itens))
 
 # --- COMANDOS DO BOT ---
 @bot.event
 async def on_ready():
-    print(f'Bot conectado como {bot.user}')
-    iniciar_banco_de_dados()
-    bot.add_view(CursoView(course_title="", course_url=""))
-    try:
-        synced = await bot.tree.sync()
-        print(f"Sincronizados {len(synced)} comandos.")
-    except Exception as e:
-        print(f"Erro ao sincronizar comandos: {e}")
+    if bot.shard_count:
+        print(f"Bot conectado como {bot.user} (shards {getattr(bot, 'shard_ids', None) or 'todos'} de {bot.shard_count})")
+    else:
+        print(f'Bot conectado como {bot.user}')
+
+@bot.event
+async def on_shard_ready(shard_id: int):
+    print(f"Shard {shard_id} pronto.")
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command: app_commands.Command):
+    bot.tree.registrar_fim(interaction, "ok")
 
 @bot.tree.command(name="cursos_gratuitos", description="Encontre cursos de TI em plataformas gratuitas.")
 async def cursos_gratuitos(interaction: discord.Interaction):
@@ -221,9 +341,11 @@ async def cursos_pagos(interaction: discord.Interaction):
 @bot.tree.command(name="pesquisar_cursos", description="Pesquisa por um termo em TODAS as plataformas.")
 @app_commands.describe(termo="O que você quer aprender?")
 async def pesquisar_cursos(interaction: discord.Interaction, termo: str):
+    if not termo.strip():
+        await interaction.response.send_message("Informe um termo para a busca. Exemplo: `/pesquisar_cursos termo:Python`", ephemeral=True)
+        return
     await interaction.response.defer(thinking=True, ephemeral=True)
-    resultados = await pesquisar_cursos_online(termo, course_type="all")
-    await _enviar_resultados_para_discord(interaction, resultados, f"🔎 Resultados da Busca por '{termo}'")
+    await _enviar_resultados_para_discord(interaction, cliente_busca.pesquisar_stream([termo], course_type="all"), [termo], f"🔎 Resultados da Busca por '{termo}'")
 
 @bot.tree.command(name="ajuda", description="Exibe informações de ajuda sobre como usar o bot.")
 async def ajuda(interaction: discord.Interaction):
@@ -241,8 +363,7 @@ async def ajuda(interaction: discord.Interaction):
 
 @bot.tree.command(name="meus_cursos", description="Mostra sua lista de cursos salvos.")
 async def meus_cursos(interaction: discord.Interaction):
-    with sqlite3.connect(DB_FILE) as con:
-        cursos = con.execute("SELECT course_title, course_url FROM inscricoes WHERE user_id = ?", (interaction.user.id,)).fetchall()
+    cursos = await banco.listar_inscricoes(interaction.user.id, limite=25)
     if not cursos:
         await interaction.response.send_message("Você não tem cursos salvos.", ephemeral=True)
         return
@@ -251,7 +372,8 @@ async def meus_cursos(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 # --- INICIA O BOT ---
-if not TOKEN:
-    print("ERRO CRÍTICO: DISCORD_TOKEN não configurado!")
-else:
-    bot.run(TOKEN)
\ No newline at end of file
+if __name__ == "__main__":
+    if not TOKEN:
+        print("ERRO CRÍTICO: DISCORD_TOKEN não configurado!")
+    else:
+        bot.run(TOKEN)
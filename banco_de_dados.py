@@ -0,0 +1,365 @@
+import asyncio
+import concurrent.futures
+import itertools
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import List, Optional, Set, Tuple
+from metricas import BUCKETS_QUANTIDADE, Histograma
+from normalizacao import url_canonica
+
+# --- MÉTRICAS ---
+BANCO_SEGUNDOS = Histograma(
+    "itboost_banco_segundos", "Duração das operações no banco, incluindo a espera pela thread do banco.", ("operacao",)
+)
+BANCO_LOTE_INSCRICOES = Histograma(
+    "itboost_banco_lote_inscricoes", "Inscrições gravadas por commit (group commit).", buckets=BUCKETS_QUANTIDADE
+)
+
+# --- SQL (compilado uma única vez pela cache de statements da conexão persistente) ---
+SQL_CRIAR_TABELA = '''
+    CREATE TABLE IF NOT EXISTS inscricoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+        course_title TEXT NOT NULL, course_url TEXT NOT NULL,
+        UNIQUE(user_id, course_url)
+    )
+'''
+# Versão do esquema em PRAGMA user_version; cada migração roda uma única vez por banco.
+VERSAO_ESQUEMA = 1
+# Índice de cobertura: `WHERE user_id = ?` é respondido só pelo índice, sem ler a tabela.
+SQL_CRIAR_INDICE_USUARIO = '''
+    CREATE INDEX IF NOT EXISTS idx_inscricoes_user_id ON inscricoes (user_id, course_title, course_url)
+'''
+# Resultados de cada busca, para que os controles das mensagens achem o curso mesmo após um restart.
+SQL_CRIAR_TABELAS_BUSCAS = '''
+    CREATE TABLE IF NOT EXISTS buscas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, titulo TEXT NOT NULL,
+        total INTEGER NOT NULL, criada_em REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS buscas_resultados (
+        busca_id INTEGER NOT NULL, posicao INTEGER NOT NULL,
+        course_title TEXT NOT NULL, course_url TEXT NOT NULL,
+        PRIMARY KEY (busca_id, posicao)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_buscas_criada_em ON buscas (criada_em);
+'''
+# Registro de cursos: cada URL ganha um id curto e estável, usado nos botões do Telegram.
+SQL_CRIAR_TABELA_REGISTRO = '''
+    CREATE TABLE IF NOT EXISTS cursos_registro (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, course_url TEXT NOT NULL UNIQUE, course_title TEXT NOT NULL
+    )
+'''
+# Pares chave/valor do próprio bot (por exemplo, a impressão digital dos comandos já sincronizados).
+SQL_CRIAR_TABELA_METADADOS = "CREATE TABLE IF NOT EXISTS metadados (chave TEXT PRIMARY KEY, valor TEXT NOT NULL) WITHOUT ROWID"
+SQL_INSERIR_INSCRICAO = "INSERT OR IGNORE INTO inscricoes (user_id, course_title, course_url) VALUES (?, ?, ?)"
+SQL_LISTAR_INSCRICOES = "SELECT course_title, course_url FROM inscricoes WHERE user_id = ? ORDER BY id LIMIT ?"
+SQL_INSERIR_BUSCA = "INSERT INTO buscas (titulo, total, criada_em) VALUES (?, ?, ?)"
+SQL_INSERIR_RESULTADO_BUSCA = "INSERT INTO buscas_resultados (busca_id, posicao, course_title, course_url) VALUES (?, ?, ?, ?)"
+SQL_OBTER_BUSCA = "SELECT titulo, total FROM buscas WHERE id = ?"
+SQL_OBTER_RESULTADOS_BUSCA = '''
+    SELECT posicao, course_title, course_url FROM buscas_resultados
+    WHERE busca_id = ? AND posicao >= ? AND posicao < ? ORDER BY posicao
+'''
+SQL_REGISTRAR_CURSO = '''
+    INSERT INTO cursos_registro (course_url, course_title) VALUES (?, ?)
+    ON CONFLICT (course_url) DO UPDATE SET course_title = excluded.course_title
+    RETURNING id
+'''
+SQL_OBTER_CURSO_REGISTRADO = "SELECT course_title, course_url FROM cursos_registro WHERE id = ?"
+SQL_APAGAR_RESULTADOS_ANTIGOS = "DELETE FROM buscas_resultados WHERE busca_id IN (SELECT id FROM buscas WHERE criada_em < ?)"
+SQL_APAGAR_BUSCAS_ANTIGAS = "DELETE FROM buscas WHERE criada_em < ?"
+SQL_OBTER_METADADO = "SELECT valor FROM metadados WHERE chave = ?"
+SQL_GRAVAR_METADADO = "INSERT INTO metadados (chave, valor) VALUES (?, ?) ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor"
+
+
+SQLITE_INTEGER_MAXIMO = 2 ** 63 - 1
+ID_CURTO_MAX_CARACTERES = 13  # len("1y2p0ij32e8e7"), SQLITE_INTEGER_MAXIMO em base 36
+
+
+def _para_base36(numero: int) -> str:
+    digitos = "0123456789abcdefghijklmnopqrstuvwxyz"
+    texto = ""
+    while True:
+        numero, resto = divmod(numero, 36)
+        texto = digitos[resto] + texto
+        if numero == 0:
+            return texto
+
+
+class BancoDeDados:
+    """Acesso ao banco de inscrições compartilhado pelos bots do Discord e do Telegram.
+
+    Mantém uma conexão persistente em modo WAL, usada sempre pela mesma thread
+    dedicada, de modo que nenhuma consulta roda no event loop. Inscrições que
+    chegam juntas são gravadas em lote, com um único commit (group commit).
+    """
+
+    def __init__(self, caminho: str, janela_lote: float = 0.005, max_lote: int = 128, retencao_buscas: float = 7 * 86400,
+                 max_cache_registro: int = 4096, limpeza_a_cada: int = 200):
+        self.caminho = caminho
+        self.max_cache_registro = max_cache_registro
+        self._cache_registro: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self.retencao_buscas = retencao_buscas
+        # Buscas antigas são apagadas na abertura e, num processo de vida longa, a cada `limpeza_a_cada` buscas salvas.
+        self.limpeza_a_cada = limpeza_a_cada
+        self._buscas_desde_limpeza = 0
+        self.janela_lote = janela_lote
+        self.max_lote = max_lote
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._conexao: Optional[sqlite3.Connection] = None
+        self._fila_escrita: Optional[asyncio.Queue] = None
+        self._escritor: Optional[asyncio.Task] = None
+        self._lock_inicio = asyncio.Lock()
+
+    # --- CICLO DE VIDA ---
+    async def iniciar(self):
+        async with self._lock_inicio:
+            if self._executor is not None:
+                return
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="banco")
+            await self._executar(self._abrir_conexao)
+            self._fila_escrita = asyncio.Queue()
+            self._escritor = asyncio.create_task(self._processar_escritas())
+
+    def _abrir_conexao(self):
+        conexao = sqlite3.connect(self.caminho, timeout=10, cached_statements=64, isolation_level=None)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        conexao.execute("PRAGMA busy_timeout=10000")
+        conexao.execute(SQL_CRIAR_TABELA)
+        conexao.execute(SQL_CRIAR_INDICE_USUARIO)
+        conexao.executescript(SQL_CRIAR_TABELAS_BUSCAS)
+        conexao.execute(SQL_CRIAR_TABELA_REGISTRO)
+        conexao.execute(SQL_CRIAR_TABELA_METADADOS)
+        if conexao.execute("PRAGMA user_version").fetchone()[0] < 1:
+            self._migrar_inscricoes_canonicas(conexao)
+        self._conexao = conexao
+        self._apagar_buscas_antigas()
+
+    def _migrar_inscricoes_canonicas(self, conexao: sqlite3.Connection):
+        """Migração 1: URLs canônicas nas inscrições, colapsando as duplicadas.
+
+        Entre inscrições do mesmo usuário com a mesma URL canônica fica a mais
+        antiga. A migração não tem volta, por isso títulos parecidos não contam:
+        "Machine Learning I" e "II" continuam sendo dois cursos.
+        """
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            linhas = conexao.execute("SELECT id, user_id, course_url FROM inscricoes ORDER BY user_id, id").fetchall()
+            apagar, atualizar = [], []
+            for _, inscricoes in itertools.groupby(linhas, key=lambda linha: linha[1]):
+                mantidas: Set[str] = set()
+                for id_inscricao, _, url in inscricoes:
+                    url = url_canonica(url)
+                    if url in mantidas:
+                        apagar.append((id_inscricao,))
+                        continue
+                    mantidas.add(url)
+                    atualizar.append((url, id_inscricao))
+            # Apagar antes de atualizar: as URLs canônicas das mantidas não colidem mais com o UNIQUE.
+            conexao.executemany("DELETE FROM inscricoes WHERE id = ?", apagar)
+            conexao.executemany("UPDATE inscricoes SET course_url = ? WHERE id = ?", atualizar)
+            conexao.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+        if apagar:
+            print(f"Migração do banco: {len(apagar)} inscrições duplicadas removidas de {len(linhas)}.")
+
+    async def fechar(self):
+        if self._executor is None:
+            return
+        await self._fila_escrita.put(None)
+        await self._escritor
+        await self._executar(self._conexao.close)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._conexao = None
+
+    async def _executar(self, funcao, *args):
+        inicio = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, funcao, *args)
+        finally:
+            BANCO_SEGUNDOS.observar(time.perf_counter() - inicio, funcao.__name__.lstrip("_"))
+
+    # --- CONSULTAS ---
+    async def listar_inscricoes(self, user_id: int, limite: int = -1) -> List[Tuple[str, str]]:
+        await self.iniciar()
+        return await self._executar(self._listar_inscricoes, user_id, limite)
+
+    def _listar_inscricoes(self, user_id: int, limite: int) -> List[Tuple[str, str]]:
+        return self._conexao.execute(SQL_LISTAR_INSCRICOES, (user_id, limite)).fetchall()
+
+    # --- RESULTADOS DE BUSCA ---
+    async def salvar_busca(self, titulo: str, cursos: List[Tuple[str, str]]) -> int:
+        """Guarda os resultados de uma busca e retorna o id usado nos controles da mensagem."""
+        await self.iniciar()
+        return await self._executar(self._salvar_busca, titulo, cursos)
+
+    def _salvar_busca(self, titulo: str, cursos: List[Tuple[str, str]]) -> int:
+        cursor = self._conexao.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute(SQL_INSERIR_BUSCA, (titulo, len(cursos), time.time()))
+            busca_id = cursor.lastrowid
+            cursor.executemany(SQL_INSERIR_RESULTADO_BUSCA, [(busca_id, i, t, u) for i, (t, u) in enumerate(cursos)])
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        self._buscas_desde_limpeza += 1
+        if self._buscas_desde_limpeza >= self.limpeza_a_cada:
+            self._apagar_buscas_antigas()
+        return busca_id
+
+    async def obter_pagina_busca(self, busca_id: int, inicio: int, quantidade: int) -> Optional[Tuple[str, int, List[Tuple[int, str, str]]]]:
+        """Retorna (titulo, total, [(posicao, titulo, url), ...]) ou None se a busca não existir mais."""
+        await self.iniciar()
+        return await self._executar(self._obter_pagina_busca, busca_id, inicio, quantidade)
+
+    def _obter_pagina_busca(self, busca_id: int, inicio: int, quantidade: int):
+        busca = self._conexao.execute(SQL_OBTER_BUSCA, (busca_id,)).fetchone()
+        if busca is None:
+            return None
+        itens = self._conexao.execute(SQL_OBTER_RESULTADOS_BUSCA, (busca_id, inicio, inicio + quantidade)).fetchall()
+        return busca[0], busca[1], itens
+
+    async def obter_resultado_busca(self, busca_id: int, posicao: int) -> Optional[Tuple[str, str]]:
+        pagina = await self.obter_pagina_busca(busca_id, posicao, 1)
+        if not pagina or not pagina[2]:
+            return None
+        _, titulo, url = pagina[2][0]
+        return titulo, url
+
+    def _apagar_buscas_antigas(self):
+        self._buscas_desde_limpeza = 0
+        limite = time.time() - self.retencao_buscas
+        with self._conexao:
+            self._conexao.execute(SQL_APAGAR_RESULTADOS_ANTIGOS, (limite,))
+            self._conexao.execute(SQL_APAGAR_BUSCAS_ANTIGAS, (limite,))
+
+    # --- REGISTRO DE CURSOS ---
+    async def registrar_cursos(self, cursos: List[Tuple[str, str]]) -> List[str]:
+        """Retorna o id curto (base 36) de cada curso, registrando as URLs ainda desconhecidas."""
+        await self.iniciar()
+        ids = await self._executar(self._registrar_cursos, cursos)
+        # A LRU guarda a URL como está no banco, para o id resolver igual com ou sem ela.
+        for id_curto, (titulo, url) in zip(ids, cursos):
+            self._lembrar_registro(id_curto, (titulo, url_canonica(url)))
+        return ids
+
+    def _registrar_cursos(self, cursos: List[Tuple[str, str]]) -> List[str]:
+        cursor = self._conexao.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [
+                _para_base36(cursor.execute(SQL_REGISTRAR_CURSO, (url_canonica(url), titulo)).fetchone()[0])
+                for titulo, url in cursos
+            ]
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        return ids
+
+    async def obter_curso_registrado(self, id_curto: str) -> Optional[Tuple[str, str]]:
+        """Resolve um id curto em (titulo, url), consultando primeiro a LRU em memória."""
+        curso = self._cache_registro.get(id_curto)
+        if curso is not None:
+            self._cache_registro.move_to_end(id_curto)
+            return curso
+        # Botões antigos (hash da URL, com 19 dígitos ou sinal) e dados forjados não são ids do registro:
+        # fora do intervalo de um INTEGER do SQLite, o sqlite3 levantaria OverflowError.
+        if len(id_curto) > ID_CURTO_MAX_CARACTERES:
+            return None
+        try:
+            numero = int(id_curto, 36)
+        except ValueError:
+            return None
+        if not 1 <= numero <= SQLITE_INTEGER_MAXIMO:
+            return None
+        await self.iniciar()
+        curso = await self._executar(self._obter_curso_registrado, numero)
+        if curso is not None:
+            self._lembrar_registro(id_curto, curso)
+        return curso
+
+    def _obter_curso_registrado(self, numero: int) -> Optional[Tuple[str, str]]:
+        return self._conexao.execute(SQL_OBTER_CURSO_REGISTRADO, (numero,)).fetchone()
+
+    def _lembrar_registro(self, id_curto: str, curso: Tuple[str, str]):
+        self._cache_registro[id_curto] = tuple(curso)
+        self._cache_registro.move_to_end(id_curto)
+        while len(self._cache_registro) > self.max_cache_registro:
+            self._cache_registro.popitem(last=False)
+
+    # --- METADADOS ---
+    async def obter_metadado(self, chave: str) -> Optional[str]:
+        await self.iniciar()
+        return await self._executar(self._obter_metadado, chave)
+
+    def _obter_metadado(self, chave: str) -> Optional[str]:
+        linha = self._conexao.execute(SQL_OBTER_METADADO, (chave,)).fetchone()
+        return linha[0] if linha else None
+
+    async def gravar_metadado(self, chave: str, valor: str):
+        await self.iniciar()
+        await self._executar(self._gravar_metadado, chave, valor)
+
+    def _gravar_metadado(self, chave: str, valor: str):
+        self._conexao.execute(SQL_GRAVAR_METADADO, (chave, valor))
+
+    # --- ESCRITAS EM LOTE ---
+    async def salvar_inscricao(self, user_id: int, course_title: str, course_url: str) -> bool:
+        """Grava a inscrição; retorna False se o usuário já tinha salvo esse curso (a mesma URL canônica)."""
+        await self.iniciar()
+        futuro = asyncio.get_running_loop().create_future()
+        parametros = (user_id, course_title, url_canonica(course_url))
+        await self._fila_escrita.put((parametros, futuro))
+        return await futuro
+
+    async def _processar_escritas(self):
+        encerrar = False
+        while not encerrar:
+            item = await self._fila_escrita.get()
+            if item is None:
+                break
+            lote = [item]
+            prazo = asyncio.get_running_loop().time() + self.janela_lote
+            while len(lote) < self.max_lote:
+                restante = prazo - asyncio.get_running_loop().time()
+                try:
+                    item = self._fila_escrita.get_nowait() if restante <= 0 else await asyncio.wait_for(self._fila_escrita.get(), restante)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is None:
+                    encerrar = True
+                    break
+                lote.append(item)
+            BANCO_LOTE_INSCRICOES.observar(len(lote))
+            try:
+                inseridos = await self._executar(self._gravar_lote, [parametros for parametros, _ in lote])
+            except Exception as e:
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+            for (_, futuro), inserido in zip(lote, inseridos):
+                if not futuro.done():
+                    futuro.set_result(inserido)
+
+    def _gravar_lote(self, lote: List[Tuple[int, str, str]]) -> List[bool]:
+        cursor = self._conexao.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            inseridos = []
+            for parametros in lote:
+                cursor.execute(SQL_INSERIR_INSCRICAO, parametros)
+                inseridos.append(cursor.rowcount == 1)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        return inseridos
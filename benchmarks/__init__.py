@@ -0,0 +1 @@
+"""Benchmarks e testes de carga offline (veja bench_scraping e servidor_local)."""
@@ -0,0 +1,202 @@
+"""Benchmark offline do scraping: parsing por site e buscas completas contra o servidor local.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_scraping --saida bench.json
+    python -m benchmarks.bench_scraping --saida novo.json --comparar bench.json
+
+Mede, sem acessar a internet:
+  * parsing: páginas/s, MB/s, links extraídos e pico de memória de _parse_courses
+    para a página gravada de cada site de SITES_DE_BUSCA e SITES_PENTEST;
+  * busca: latência até o primeiro site e até o fim de pesquisar_cursos_stream,
+    em percentis, com latência/jitter/erros injetados pelo servidor local;
+  * memória: pico de RSS do processo.
+O resultado vai para um JSON; com --comparar, as métricas principais são
+confrontadas com um resultado anterior e o código de saída é 1 se alguma piorar
+mais que a tolerância.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from benchmarks import fixtures
+from benchmarks.servidor_local import ServidorLocal
+
+
+def percentil(valores: List[float], fracao: float) -> Optional[float]:
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))]
+
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir_parsing(servico, duracao_minima: float) -> Dict[str, dict]:
+    resultados = {}
+    for site, dados in fixtures.todos_os_sites().items():
+        html = fixtures.carregar(site)
+        tracemalloc.start()
+        cursos = servico._parse_courses(html, dados["base"], dados["filter"])
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        repeticoes, inicio = 0, time.perf_counter()
+        while True:
+            servico._parse_courses(html, dados["base"], dados["filter"])
+            repeticoes += 1
+            decorrido = time.perf_counter() - inicio
+            if decorrido >= duracao_minima:
+                break
+        tamanho = len(html.encode("utf-8"))
+        resultados[site] = {
+            "bytes": tamanho,
+            "links": len(cursos),
+            "media_ms": decorrido / repeticoes * 1000,
+            "paginas_por_s": repeticoes / decorrido,
+            "mb_por_s": tamanho * repeticoes / decorrido / 1e6,
+            "pico_memoria_kib": pico // 1024,
+        }
+        print(f"  {site:32} {resultados[site]['media_ms']:8.2f} ms  {resultados[site]['mb_por_s']:6.1f} MB/s  {len(cursos):4} links")
+    return resultados
+
+
+async def medir_buscas(servico, args) -> Dict[str, object]:
+    servidor = ServidorLocal(args.latencia, args.jitter, args.erros, args.travamentos, semente=42)
+    await servidor.redirecionar_catalogo()
+    await servico.iniciar_motor()  # sessão HTTP e workers de parsing prontos antes da primeira busca, como no serviço
+    primeiros, totais, quantidades = [], [], []
+    vagas = asyncio.Semaphore(args.concorrencia)
+
+    async def uma_busca(indice: int):
+        async with vagas:
+            # Termos distintos: cada busca passa pelo scraping em vez de sair do cache em memória.
+            inicio = time.perf_counter()
+            primeiro, cursos = None, 0
+            async for _, cursos_site in servico.pesquisar_cursos_stream(f"python {indice}", "all"):
+                if primeiro is None:
+                    primeiro = time.perf_counter() - inicio
+                cursos += len(cursos_site)
+            totais.append(time.perf_counter() - inicio)
+            primeiros.append(primeiro if primeiro is not None else totais[-1])
+            quantidades.append(cursos)
+
+    try:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(uma_busca(i) for i in range(args.buscas)))
+        duracao = time.perf_counter() - inicio
+    finally:
+        await servico.encerrar_motor()
+        await servidor.encerrar()
+    ms = lambda valor: valor * 1000 if valor is not None else None
+    return {
+        "buscas": args.buscas,
+        "concorrencia": args.concorrencia,
+        "buscas_por_s": args.buscas / duracao,
+        "primeiro_site_p50_ms": ms(percentil(primeiros, 0.50)),
+        "primeiro_site_p99_ms": ms(percentil(primeiros, 0.99)),
+        "total_p50_ms": ms(percentil(totais, 0.50)),
+        "total_p90_ms": ms(percentil(totais, 0.90)),
+        "total_p99_ms": ms(percentil(totais, 0.99)),
+        "total_max_ms": ms(max(totais)),
+        "cursos_por_busca": sum(quantidades) / len(quantidades),
+        "servidor": servidor.estatisticas(),
+        "sites": servico.monitor_sites.estatisticas(),
+    }
+
+
+# (caminho da métrica, maior é melhor)
+METRICAS_COMPARADAS = [
+    (("busca", "total_p50_ms"), False),
+    (("busca", "total_p99_ms"), False),
+    (("busca", "primeiro_site_p50_ms"), False),
+    (("busca", "buscas_por_s"), True),
+    (("memoria", "rss_pico_kib"), False),
+]
+
+
+def comparar(atual: dict, anterior: dict, tolerancia: float) -> bool:
+    """Imprime as variações em relação ao resultado anterior; True se houve regressão."""
+    metricas = list(METRICAS_COMPARADAS)
+    metricas += [(("parsing", site, "mb_por_s"), True) for site in atual["parsing"] if site in anterior.get("parsing", {})]
+    regressao = False
+    print(f"\nComparação com {anterior.get('commit') or 'resultado anterior'} (tolerância {tolerancia:.0%}):")
+    for caminho, maior_melhor in metricas:
+        try:
+            novo, velho = atual, anterior
+            for chave in caminho:
+                novo, velho = novo[chave], velho[chave]
+        except (KeyError, TypeError):
+            continue
+        if not velho:
+            continue
+        variacao = (novo - velho) / velho
+        piorou = variacao < -tolerancia if maior_melhor else variacao > tolerancia
+        regressao |= piorou
+        print(f"  {'/'.join(caminho):48} {velho:12.2f} -> {novo:12.2f} ({variacao:+.1%}){'  REGRESSÃO' if piorou else ''}")
+    return regressao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--saida", default="bench.json", help="arquivo JSON com os resultados")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="piora relativa aceita na comparação")
+    parser.add_argument("--duracao-parsing", type=float, default=0.5, help="segundos de parsing medidos por site")
+    parser.add_argument("--buscas", type=int, default=40)
+    parser.add_argument("--concorrencia", type=int, default=4)
+    parser.add_argument("--latencia", type=float, default=150, help="latência média do servidor local (ms)")
+    parser.add_argument("--jitter", type=float, default=50, help="desvio padrão da latência (ms)")
+    parser.add_argument("--erros", type=float, default=0.0, help="fração de respostas 429/503")
+    parser.add_argument("--travamentos", type=float, default=0.0, help="fração de requisições que nunca respondem")
+    args = parser.parse_args()
+
+    # Índice e cache em disco descartáveis: o benchmark mede o scraping, não dados de execuções anteriores.
+    temporario = tempfile.TemporaryDirectory()
+    os.environ["ITBOOST_INDICE_DB"] = os.path.join(temporario.name, "indice.db")
+    os.environ["ITBOOST_HTTP_CACHE_DB"] = os.path.join(temporario.name, "cache_http.db")
+    import servico_busca
+
+    print("Parsing:")
+    parsing = medir_parsing(servico_busca, args.duracao_parsing)
+    print(f"Buscas: {args.buscas} com concorrência {args.concorrencia}...")
+    busca = asyncio.run(medir_buscas(servico_busca, args))
+    print(f"  primeiro site p50 {busca['primeiro_site_p50_ms']:.0f} ms · total p50 {busca['total_p50_ms']:.0f} ms "
+          f"· p99 {busca['total_p99_ms']:.0f} ms · {busca['buscas_por_s']:.1f} buscas/s")
+    resultado = {
+        "versao": 1,
+        "commit": _commit_atual(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "configuracao": {chave: valor for chave, valor in vars(args).items() if chave not in ("saida", "comparar")},
+        "parsing": parsing,
+        "busca": busca,
+        "memoria": {"rss_pico_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss},
+    }
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {args.saida}")
+    servico_busca.indice_cursos.fechar()
+    servico_busca.cache_paginas.fechar()
+    temporario.cleanup()
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            if comparar(resultado, json.load(arquivo), args.tolerancia):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""Teste de carga dos handlers dos bots com usuários simultâneos simulados.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.carga_bots --bot discord --niveis 1,4,16,64 --duracao 20
+    python -m benchmarks.carga_bots --bot ambos --saida carga.json
+
+Cada usuário virtual repete uma sessão típica chamando os handlers reais:
+  * Discord (ITBOOST.py): /pesquisar_cursos ou CategoriaSelect.callback, depois
+    SelecionarCursoParaSalvar.callback com um dos resultados e /meus_cursos;
+  * Telegram (telegram-bot.py): /pesquisar_cursos ou um botão de categoria, o
+    botão "save:<id>" de um resultado e /meus_cursos.
+As interações do Discord e os Update/Context do Telegram são objetos falsos que
+só imitam a latência da API; o scraping vai para o servidor local de
+benchmarks.servidor_local, com o motor de busca embutido no processo.
+
+A concorrência sobe nível a nível. Para cada nível são relatados sessões/s,
+p50/p99 de cada operação, atraso do event loop e o tempo das chamadas ao banco
+(incluindo a espera na fila do executor, que é onde a contenção aparece). A
+rampa para quando o p99 de alguma operação passa de --limite-p99.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from benchmarks.bench_scraping import percentil
+from benchmarks.servidor_local import ServidorLocal
+
+RAIZ = Path(__file__).resolve().parent.parent
+TERMOS_POPULARES = ["python", "java", "sql", "aws", "docker", "redes", "javascript", "linux"]
+METODOS_DO_BANCO = (
+    "listar_inscricoes", "salvar_busca", "obter_pagina_busca", "obter_resultado_busca",
+    "registrar_cursos", "obter_curso_registrado", "salvar_inscricao",
+)
+
+
+class Medicoes:
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = {}
+        self.erros: Dict[str, int] = {}
+        self.atrasos_loop: List[float] = []
+        self.sessoes = 0
+
+    async def cronometrar(self, operacao: str, corrotina: Awaitable):
+        inicio = time.perf_counter()
+        try:
+            return await corrotina
+        except Exception as e:
+            if not self.erros.get(operacao):
+                print(f"    erro em {operacao}: {e!r}")
+            self.erros[operacao] = self.erros.get(operacao, 0) + 1
+        finally:
+            self.latencias.setdefault(operacao, []).append(time.perf_counter() - inicio)
+
+    def resumo(self, duracao: float) -> Dict[str, object]:
+        ms = lambda valor: round(valor * 1000, 2) if valor is not None else None
+        return {
+            "sessoes_por_s": self.sessoes / duracao,
+            "operacoes": {
+                operacao: {
+                    "chamadas": len(valores),
+                    "por_s": len(valores) / duracao,
+                    "p50_ms": ms(percentil(valores, 0.50)),
+                    "p99_ms": ms(percentil(valores, 0.99)),
+                    "max_ms": ms(max(valores)),
+                    "erros": self.erros.get(operacao, 0),
+                }
+                for operacao, valores in sorted(self.latencias.items())
+            },
+            "loop": {
+                "atraso_p50_ms": ms(percentil(self.atrasos_loop, 0.50)),
+                "atraso_p99_ms": ms(percentil(self.atrasos_loop, 0.99)),
+                "atraso_max_ms": ms(max(self.atrasos_loop, default=None)),
+            },
+        }
+
+
+def cronometrar_banco(banco, prefixo: str, medicoes: Callable[[], Medicoes]):
+    """Envolve os métodos assíncronos da instância do banco para medir cada chamada."""
+    for nome in METODOS_DO_BANCO:
+        original = getattr(banco, nome)
+
+        def medido(*args, _original=original, _operacao=f"{prefixo}.{nome}", **kwargs):
+            return medicoes().cronometrar(_operacao, _original(*args, **kwargs))
+
+        setattr(banco, nome, medido)
+
+
+async def monitorar_loop(medicoes: Callable[[], Medicoes], intervalo: float = 0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        inicio = loop.time()
+        await asyncio.sleep(intervalo)
+        medicoes().atrasos_loop.append(max(0.0, loop.time() - inicio - intervalo))
+
+
+# --- DISCORD ---
+class _MensagemDiscord:
+    def __init__(self, latencia: float, **kwargs):
+        self._latencia = latencia
+        self.kwargs = kwargs
+
+    async def edit(self, **kwargs):
+        await asyncio.sleep(self._latencia)
+        self.kwargs.update(kwargs)
+        return self
+
+
+class InteracaoDiscord:
+    """Imita o suficiente de discord.Interaction para os handlers do ITBOOST.py."""
+
+    def __init__(self, user_id: int, latencia_api: float):
+        self.user = SimpleNamespace(id=user_id)
+        self._latencia = latencia_api
+        self.mensagens: List[_MensagemDiscord] = []
+        self.response = SimpleNamespace(defer=self._responder, send_message=self._responder, edit_message=self._responder)
+        self.followup = SimpleNamespace(send=self._enviar)
+
+    async def _responder(self, *args, **kwargs):
+        await asyncio.sleep(self._latencia)
+
+    async def _enviar(self, *args, wait: bool = False, **kwargs):
+        await asyncio.sleep(self._latencia)
+        mensagem = _MensagemDiscord(self._latencia, **kwargs)
+        self.mensagens.append(mensagem)
+        return mensagem
+
+    def ultima_view(self):
+        for mensagem in reversed(self.mensagens):
+            if mensagem.kwargs.get("view") is not None:
+                return mensagem.kwargs["view"]
+        return None
+
+
+async def sessao_discord(bot, medicoes: Medicoes, aleatorio: random.Random, user_id: int, termo: str, latencia_api: float):
+    interacao = InteracaoDiscord(user_id, latencia_api)
+    if aleatorio.random() < 0.5:
+        await medicoes.cronometrar("discord.pesquisar_cursos", bot.pesquisar_cursos.callback(interacao, termo))
+    else:
+        seletor = bot.CategoriaSelect(aleatorio.choice(["free", "paid"]))
+        seletor._values = [aleatorio.choice(list(bot.MAPA_CATEGORIAS))]
+        await medicoes.cronometrar("discord.categoria", seletor.callback(interacao))
+    view = interacao.ultima_view()
+    if view is not None:
+        salvar = next(item for item in view.children if isinstance(item, bot.SelecionarCursoParaSalvar))
+        salvar.item._values = [aleatorio.choice(salvar.item.options).value]
+        await medicoes.cronometrar("discord.salvar", salvar.callback(InteracaoDiscord(user_id, latencia_api)))
+    await medicoes.cronometrar("discord.meus_cursos", bot.meus_cursos.callback(InteracaoDiscord(user_id, latencia_api)))
+
+
+# --- TELEGRAM ---
+class _BotTelegram:
+    def __init__(self, latencia_api: float):
+        self._latencia = latencia_api
+        self.enviadas: List[dict] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        await asyncio.sleep(self._latencia)
+        self.enviadas.append({"text": text, **kwargs})
+
+    async def answer_callback_query(self, *args, **kwargs):
+        await asyncio.sleep(self._latencia)
+
+
+def update_telegram(user_id: int, latencia_api: float, callback_data: Optional[str] = None):
+    """Monta um Update falso com mensagem ou callback_query, como o python-telegram-bot entrega."""
+    async def responder(*args, **kwargs):
+        await asyncio.sleep(latencia_api)
+
+    usuario = SimpleNamespace(id=user_id, mention_markdown_v2=lambda: f"[usuario](tg://user?id={user_id})", mention_html=lambda: "usuario")
+    mensagem = SimpleNamespace(reply_text=responder, reply_html=responder, reply_markdown_v2=responder, text="Curso", text_markdown_v2="Curso")
+    consulta = None
+    if callback_data is not None:
+        consulta = SimpleNamespace(
+            id=str(user_id), data=callback_data, from_user=usuario, message=mensagem,
+            answer=responder, edit_message_text=responder,
+        )
+    return SimpleNamespace(
+        effective_user=usuario, effective_chat=SimpleNamespace(id=user_id),
+        message=mensagem, callback_query=consulta,
+    )
+
+
+async def sessao_telegram(bot, medicoes: Medicoes, aleatorio: random.Random, user_id: int, termo: str, latencia_api: float):
+    contexto = SimpleNamespace(args=termo.split(), bot=_BotTelegram(latencia_api))
+    if aleatorio.random() < 0.5:
+        await medicoes.cronometrar("telegram.pesquisar_cursos", bot.pesquisar_cursos(update_telegram(user_id, latencia_api), contexto))
+    else:
+        categoria = aleatorio.choice(["programacao", "redes", "cloud", "dados", "ciencia_dados", "devops", "seguranca"])
+        await medicoes.cronometrar(
+            "telegram.categoria", bot.button_callback_handler(update_telegram(user_id, latencia_api, f"cat_{categoria}"), contexto)
+        )
+    botoes = [
+        enviada["reply_markup"].inline_keyboard[0][0].callback_data
+        for enviada in contexto.bot.enviadas if enviada.get("reply_markup") is not None
+    ]
+    if botoes:
+        await medicoes.cronometrar(
+            "telegram.salvar",
+            bot.button_callback_handler(update_telegram(user_id, latencia_api, aleatorio.choice(botoes)), SimpleNamespace(bot=_BotTelegram(latencia_api))),
+        )
+    await medicoes.cronometrar("telegram.meus_cursos", bot.meus_cursos(update_telegram(user_id, latencia_api), contexto))
+
+
+def carregar_telegram():
+    spec = importlib.util.spec_from_file_location("telegram_bot", RAIZ / "telegram-bot.py")
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# --- RAMPA ---
+async def executar(args) -> List[dict]:
+    from banco_de_dados import BancoDeDados
+
+    atuais = [Medicoes()]
+    medicoes = lambda: atuais[0]
+    bots = []
+    if args.bot in ("discord", "ambos"):
+        import ITBOOST
+        bots.append((ITBOOST, sessao_discord))
+    if args.bot in ("telegram", "ambos"):
+        bots.append((carregar_telegram(), sessao_telegram))
+    logging.getLogger().setLevel(logging.WARNING)
+    # Cada bot com sua instância do banco, no mesmo arquivo, como em produção.
+    for modulo, _ in bots:
+        modulo.banco = BancoDeDados(args.banco)
+        cronometrar_banco(modulo.banco, modulo.__name__, medicoes)
+        await modulo.banco.iniciar()
+
+    servidor = ServidorLocal(args.latencia, args.jitter, args.erros, semente=7)
+    await servidor.redirecionar_catalogo()
+    monitor = asyncio.create_task(monitorar_loop(medicoes))
+    niveis = []
+    try:
+        for nivel in args.niveis:
+            atuais[0] = Medicoes()
+            fim = time.perf_counter() + args.duracao
+            contador = iter(range(10**9))
+
+            async def usuario_virtual(indice: int):
+                aleatorio = random.Random(f"{nivel}:{indice}")
+                modulo, sessao = bots[indice % len(bots)]
+                user_id = 10**6 * nivel + indice
+                while time.perf_counter() < fim:
+                    if aleatorio.random() < args.fracao_repetidos:
+                        termo = aleatorio.choice(TERMOS_POPULARES)
+                    else:
+                        termo = f"{aleatorio.choice(TERMOS_POPULARES)} {next(contador)}"
+                    await sessao(modulo, medicoes(), aleatorio, user_id, termo, args.latencia_api / 1000)
+                    medicoes().sessoes += 1
+
+            inicio = time.perf_counter()
+            await asyncio.gather(*(usuario_virtual(i) for i in range(nivel)))
+            resumo = {"usuarios": nivel, **medicoes().resumo(time.perf_counter() - inicio)}
+            niveis.append(resumo)
+            imprimir_nivel(resumo)
+            pior_p99 = max((dados["p99_ms"] for dados in resumo["operacoes"].values()), default=0)
+            if pior_p99 > args.limite_p99:
+                print(f"  p99 passou de {args.limite_p99:.0f} ms com {nivel} usuários; rampa interrompida.")
+                break
+    finally:
+        monitor.cancel()
+        for modulo, _ in bots:
+            await modulo.cliente_busca.fechar()
+            await modulo.banco.fechar()
+        await servidor.encerrar()
+    return niveis
+
+
+def imprimir_nivel(resumo: dict):
+    loop = resumo["loop"]
+    print(f"\n{resumo['usuarios']} usuários: {resumo['sessoes_por_s']:.2f} sessões/s · "
+          f"atraso do loop p99 {loop['atraso_p99_ms']} ms (máx. {loop['atraso_max_ms']} ms)")
+    for operacao, dados in resumo["operacoes"].items():
+        print(f"  {operacao:40} {dados['chamadas']:6} chamadas  p50 {dados['p50_ms']:9.1f} ms  "
+              f"p99 {dados['p99_ms']:9.1f} ms  erros {dados['erros']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bot", choices=("discord", "telegram", "ambos"), default="discord")
+    parser.add_argument("--niveis", type=lambda texto: [int(n) for n in texto.split(",")], default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--duracao", type=float, default=15, help="segundos em cada nível de concorrência")
+    parser.add_argument("--limite-p99", type=float, default=10000, help="p99 (ms) a partir do qual a rampa para")
+    parser.add_argument("--fracao-repetidos", type=float, default=0.5, help="fração das buscas com termos populares (cacheáveis)")
+    parser.add_argument("--latencia", type=float, default=150, help="latência média dos sites simulados (ms)")
+    parser.add_argument("--jitter", type=float, default=50, help="desvio padrão da latência dos sites (ms)")
+    parser.add_argument("--erros", type=float, default=0.0, help="fração de respostas 429/503 dos sites")
+    parser.add_argument("--latencia-api", type=float, default=40, help="latência simulada da API do Discord/Telegram (ms)")
+    parser.add_argument("--saida", help="arquivo JSON com os resultados de cada nível")
+    args = parser.parse_args()
+
+    temporario = tempfile.TemporaryDirectory()
+    args.banco = os.path.join(temporario.name, "cursos_usuarios.db")
+    os.environ["ITBOOST_SERVICO_URL"] = "embutido"
+    os.environ["ITBOOST_INDICE_DB"] = os.path.join(temporario.name, "indice.db")
+    os.environ["ITBOOST_HTTP_CACHE_DB"] = os.path.join(temporario.name, "cache_http.db")
+    niveis = asyncio.run(executar(args))
+    if args.saida:
+        configuracao = {chave: valor for chave, valor in vars(args).items() if chave not in ("saida", "banco")}
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump({"configuracao": configuracao, "niveis": niveis}, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em {args.saida}")
+    temporario.cleanup()
+
+
+if __name__ == "__main__":
+    main()
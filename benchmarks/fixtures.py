@@ -0,0 +1,122 @@
+"""Páginas de resultado gravadas de cada site do catálogo, usadas pelos benchmarks.
+
+Uso:
+    python -m benchmarks.fixtures gravar [--termo python]   # baixa as páginas reais
+    python -m benchmarks.fixtures sintetizar                 # recria as páginas sintéticas
+
+As páginas ficam em benchmarks/paginas/<site>.html.gz. As que vêm no repositório
+são sintéticas: reproduzem a estrutura de links de cada site (caminho filtrado,
+cartões com texto ou só imagem, links relativos e absolutos, navegação e scripts
+embutidos), mas não o HTML exato. `gravar` as substitui por capturas reais.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import re
+import urllib.parse
+from pathlib import Path
+from typing import Dict
+
+from catalogo import SITES_DE_BUSCA, SITES_PENTEST
+
+DIRETORIO_PAGINAS = Path(__file__).with_name("paginas")
+PALAVRAS = (
+    "python java javascript redes cloud aws azure docker kubernetes sql dados machine learning "
+    "segurança pentest linux devops introdução avançado fundamentos completo prático projetos "
+    "web api banco react node git algoritmos estatística hacking ético infraestrutura"
+).split()
+
+
+def todos_os_sites() -> Dict[str, dict]:
+    return {**SITES_DE_BUSCA, **SITES_PENTEST}
+
+
+def nome_arquivo(site: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", site.lower()).strip("-")
+
+
+def caminho_pagina(site: str) -> Path:
+    return DIRETORIO_PAGINAS / f"{nome_arquivo(site)}.html.gz"
+
+
+def carregar(site: str) -> str:
+    return gzip.decompress(caminho_pagina(site).read_bytes()).decode("utf-8")
+
+
+def _salvar(site: str, html: str):
+    DIRETORIO_PAGINAS.mkdir(exist_ok=True)
+    caminho_pagina(site).write_bytes(gzip.compress(html.encode("utf-8"), 9, mtime=0))
+
+
+def sintetizar(site: str, dados: dict) -> str:
+    """Gera uma página de resultados determinística com a forma de links do site."""
+    aleatorio = random.Random(site)
+    base, filtro = dados["base"], dados["filter"]
+    prefixo = filtro.rstrip("/") + "/"
+    origem = "{0.scheme}://{0.netloc}".format(urllib.parse.urlsplit(base))
+    partes = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>Busca</title>']
+    partes += [f'<link rel="stylesheet" href="/static/css/{i}.css">' for i in range(aleatorio.randint(3, 12))]
+    estado = {"cursos": [{"id": i, "nome": " ".join(aleatorio.choices(PALAVRAS, k=6))} for i in range(aleatorio.randint(200, 1500))]}
+    partes.append(f"<script>window.__ESTADO__ = {json.dumps(estado, ensure_ascii=False)};</script></head><body>")
+    partes.append("<nav>" + "".join(
+        f'<a href="/{secao}">{secao.title()}</a>' for secao in ("", "sobre", "entrar", "planos", "empresas", "blog", "ajuda")
+    ) + "</nav><aside>" + "".join(
+        # Links que contêm o filtro mas não são cursos: listagens, tags e autores.
+        f'<a href="{prefixo}{secao}/{palavra}/">{palavra.title()}</a>'
+        for secao in ("tag", "author") for palavra in aleatorio.sample(PALAVRAS, 8)
+    ) + f'<a href="{prefixo}">Todos</a></aside><main><ul>')
+    for i in range(aleatorio.randint(20, 60)):
+        titulo = " ".join(aleatorio.choices(PALAVRAS, k=aleatorio.randint(2, 7))).capitalize()
+        caminho = prefixo + urllib.parse.quote("-".join(titulo.lower().split())) + f"-{i}"
+        href = origem + caminho if aleatorio.random() < 0.3 else caminho
+        variante = aleatorio.random()
+        if variante < 0.15:
+            conteudo = f'<img src="/img/{i}.jpg" alt="{titulo}">'
+        elif variante < 0.25:
+            conteudo = f'<img src="/img/{i}.jpg" alt="">'
+        else:
+            conteudo = f'<div class="card"><h3><span>{titulo}</span></h3><p>{" ".join(aleatorio.choices(PALAVRAS, k=20))}</p></div>'
+        partes.append(f'<li><a href="{href}?ref=busca">{conteudo}</a><a href="{href}">Ver curso</a></li>')
+    partes.append("</ul></main><footer>")
+    partes += [f'<a href="/pagina/{i}">Página {i}</a>' for i in range(aleatorio.randint(20, 120))]
+    partes.append("</footer></body></html>")
+    return "".join(partes)
+
+
+async def gravar(termo: str):
+    import aiohttp
+    from servico_busca import HEADERS_HTTP
+
+    async with aiohttp.ClientSession(headers=HEADERS_HTTP, timeout=aiohttp.ClientTimeout(total=30)) as sessao:
+        async def baixar(site: str, dados: dict):
+            url = dados["url"].format(urllib.parse.quote_plus(termo))
+            try:
+                async with sessao.get(url) as resposta:
+                    resposta.raise_for_status()
+                    _salvar(site, await resposta.text())
+                print(f"{site}: gravado de {url}")
+            except Exception as e:
+                print(f"{site}: falhou ({e}); a página anterior foi mantida")
+
+        await asyncio.gather(*(baixar(site, dados) for site, dados in todos_os_sites().items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comando_gravar = comandos.add_parser("gravar", help="baixa a página de resultados real de cada site")
+    comando_gravar.add_argument("--termo", default="python")
+    comandos.add_parser("sintetizar", help="recria as páginas sintéticas")
+    args = parser.parse_args()
+    if args.comando == "gravar":
+        asyncio.run(gravar(args.termo))
+    else:
+        for site, dados in todos_os_sites().items():
+            _salvar(site, sintetizar(site, dados))
+            print(f"{site}: {caminho_pagina(site).name}")
+
+
+if __name__ == "__main__":
+    main()
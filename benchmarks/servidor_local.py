@@ -0,0 +1,97 @@
+"""Servidor HTTP local que faz o papel dos sites de cursos nos benchmarks e testes de carga.
+
+Cada site do catálogo ganha uma porta própria (hosts distintos para o circuit
+breaker e para o limite de conexões por host) e responde com a página gravada em
+benchmarks/paginas, depois de uma latência configurável com jitter. Uma fração
+das requisições pode falhar com 503 ou 429 (com Retry-After) ou ficar pendurada até o timeout.
+"""
+import asyncio
+import random
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from benchmarks import fixtures
+from catalogo import SITES_DE_BUSCA, SITES_PENTEST
+
+
+class ServidorLocal:
+    def __init__(self, latencia_ms: float = 150, jitter_ms: float = 50, taxa_erro: float = 0.0,
+                 taxa_travamento: float = 0.0, semente: Optional[int] = None):
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.taxa_erro = taxa_erro
+        self.taxa_travamento = taxa_travamento
+        self._aleatorio = random.Random(semente)
+        self._paginas: Dict[str, bytes] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._originais: Dict[str, dict] = {}
+        self.requisicoes = 0
+        self.erros_injetados = 0
+        self.travamentos_injetados = 0
+        self.bytes_enviados = 0
+
+    async def _responder(self, request: web.Request) -> web.Response:
+        self.requisicoes += 1
+        atraso = max(0.0, self._aleatorio.gauss(self.latencia_ms, self.jitter_ms)) / 1000
+        sorteio = self._aleatorio.random()
+        if sorteio < self.taxa_travamento:
+            self.travamentos_injetados += 1
+            await asyncio.sleep(3600)
+        await asyncio.sleep(atraso)
+        if sorteio < self.taxa_travamento + self.taxa_erro:
+            self.erros_injetados += 1
+            status = self._aleatorio.choice((429, 503))
+            return web.Response(status=status, headers={"Retry-After": "1"} if status == 429 else None)
+        corpo = self._paginas[request.match_info["site"]]
+        self.bytes_enviados += len(corpo)
+        return web.Response(body=corpo, content_type="text/html", charset="utf-8")
+
+    async def iniciar(self, sites: Dict[str, dict]) -> Dict[str, dict]:
+        """Sobe o servidor e devolve uma cópia das entradas do catálogo apontando para ele."""
+        app = web.Application()
+        app.router.add_get("/{site}", self._responder)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        redirecionados = {}
+        for site, dados in sites.items():
+            chave = fixtures.nome_arquivo(site)
+            self._paginas[chave] = fixtures.carregar(site).encode("utf-8")
+            await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+            porta = self._runner.addresses[-1][1]
+            url = f"http://127.0.0.1:{porta}/{chave}" + ("?q={}" if "{}" in dados["url"] else "")
+            redirecionados[site] = {**dados, "url": url}
+            if dados.get("url_gratis"):
+                redirecionados[site]["url_gratis"] = url
+        return redirecionados
+
+    async def redirecionar_catalogo(self):
+        """Sobe o servidor e aponta as tabelas do catálogo para ele, in-place.
+
+        Os dicionários de `catalogo` são os mesmos objetos usados pelo serviço de
+        busca, então a troca vale para qualquer busca feita depois. `encerrar`
+        restaura as URLs originais.
+        """
+        redirecionados = await self.iniciar(fixtures.todos_os_sites())
+        for tabela in (SITES_DE_BUSCA, SITES_PENTEST):
+            for site, dados in tabela.items():
+                self._originais[site] = dict(dados)
+                dados.update(redirecionados[site])
+
+    async def encerrar(self):
+        for tabela in (SITES_DE_BUSCA, SITES_PENTEST):
+            for site, dados in tabela.items():
+                if site in self._originais:
+                    dados.update(self._originais[site])
+        self._originais.clear()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {
+            "requisicoes": self.requisicoes,
+            "erros_injetados": self.erros_injetados,
+            "travamentos_injetados": self.travamentos_injetados,
+            "bytes_enviados": self.bytes_enviados,
+        }
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, NamedTuple, Optional
+
+
+class RespostaCacheada(NamedTuple):
+    corpo: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresco: bool
+
+
+def hash_conteudo(corpo: str) -> str:
+    return hashlib.blake2b(corpo.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def _max_age(cache_control: str) -> Optional[float]:
+    """Tempo de vida informado pelo servidor; None quando a resposta não pode ser guardada."""
+    diretivas = cache_control.lower()
+    if "no-store" in diretivas:
+        return None
+    if "no-cache" in diretivas:
+        return 0.0
+    encontrado = re.search(r"max-age=(\d+)", diretivas)
+    return float(encontrado.group(1)) if encontrado else 0.0
+
+
+class CacheHTTP:
+    """Cache em disco (SQLite) das páginas baixadas e dos cursos extraídos delas.
+
+    As páginas ficam comprimidas junto com ETag/Last-Modified, para que a próxima
+    busca mande uma requisição condicional e receba um 304 em vez da página
+    inteira. O total de bytes comprimidos é limitado a `max_bytes`; acima disso as
+    páginas usadas há mais tempo saem primeiro. A extração de cada página fica
+    memorizada pelo hash do conteúdo: HTML idêntico não é analisado de novo.
+    Como o IndiceCursos, os métodos são síncronos e o serviço os chama via
+    asyncio.to_thread.
+    """
+
+    def __init__(self, caminho: str, max_bytes: int, max_extracoes: int = 8192):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self.max_extracoes = max_extracoes
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._criar_tabelas()
+        with self._lock:
+            self._bytes_total = self._conexao.execute("SELECT COALESCE(SUM(LENGTH(corpo)), 0) FROM respostas").fetchone()[0]
+            self._total_extracoes = self._conexao.execute("SELECT COUNT(*) FROM extracoes").fetchone()[0]
+        self.hits_frescos = 0
+        self.revalidacoes = 0
+        self.nao_modificados = 0
+        self.bytes_economizados = 0
+        self.extracoes_reaproveitadas = 0
+        self.extracoes_novas = 0
+        self.evictions = 0
+
+    def _criar_tabelas(self):
+        with self._lock, self._conexao:
+            self._conexao.executescript('''
+                CREATE TABLE IF NOT EXISTS respostas (
+                    url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,
+                    expira_em REAL NOT NULL, acessado_em REAL NOT NULL, corpo BLOB NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_respostas_acessado_em ON respostas (acessado_em);
+                CREATE TABLE IF NOT EXISTS extracoes (
+                    hash TEXT NOT NULL, base TEXT NOT NULL, filtro TEXT NOT NULL,
+                    usado_em REAL NOT NULL, cursos TEXT NOT NULL,
+                    PRIMARY KEY (hash, base, filtro)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_extracoes_usado_em ON extracoes (usado_em);
+            ''')
+
+    # --- páginas ---
+    def obter(self, url: str) -> Optional[RespostaCacheada]:
+        with self._lock, self._conexao:
+            linha = self._conexao.execute(
+                "SELECT etag, last_modified, expira_em, corpo FROM respostas WHERE url = ?", (url,)
+            ).fetchone()
+            if linha is None:
+                return None
+            self._conexao.execute("UPDATE respostas SET acessado_em = ? WHERE url = ?", (time.time(), url))
+        etag, last_modified, expira_em, corpo = linha
+        fresco = expira_em > time.time()
+        if fresco:
+            self.hits_frescos += 1
+        else:
+            self.revalidacoes += 1
+        return RespostaCacheada(zlib.decompress(corpo).decode("utf-8", "surrogatepass"), etag, last_modified, fresco)
+
+    def guardar(self, url: str, corpo: str, etag: Optional[str], last_modified: Optional[str], cache_control: str):
+        """Guarda a página se o servidor permitir e ela puder ser revalidada (ou tiver max-age)."""
+        max_age = _max_age(cache_control)
+        if max_age is None or not (etag or last_modified or max_age):
+            return
+        comprimido = zlib.compress(corpo.encode("utf-8", "surrogatepass"), 6)
+        if len(comprimido) > self.max_bytes:
+            return
+        agora = time.time()
+        with self._lock, self._conexao:
+            anterior = self._conexao.execute("SELECT LENGTH(corpo) FROM respostas WHERE url = ?", (url,)).fetchone()
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO respostas (url, etag, last_modified, expira_em, acessado_em, corpo) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, agora + max_age, agora, comprimido),
+            )
+            self._bytes_total += len(comprimido) - (anterior[0] if anterior else 0)
+            self._despejar_respostas()
+
+    def renovar(self, url: str, cache_control: str, tamanho: int):
+        """Registra um 304: a página guardada continua valendo por mais max-age segundos."""
+        max_age = _max_age(cache_control) or 0.0
+        self.nao_modificados += 1
+        self.bytes_economizados += tamanho
+        with self._lock, self._conexao:
+            self._conexao.execute("UPDATE respostas SET expira_em = ? WHERE url = ?", (time.time() + max_age, url))
+
+    def _despejar_respostas(self):
+        while self._bytes_total > self.max_bytes:
+            linhas = self._conexao.execute(
+                "DELETE FROM respostas WHERE url IN (SELECT url FROM respostas ORDER BY acessado_em LIMIT 16) RETURNING LENGTH(corpo)"
+            ).fetchall()
+            if not linhas:
+                self._bytes_total = 0
+                break
+            self._bytes_total -= sum(tamanho for (tamanho,) in linhas)
+            self.evictions += len(linhas)
+
+    # --- extrações ---
+    def obter_extracao(self, hash_pagina: str, base: str, filtro: str) -> Optional[List[tuple[str, str]]]:
+        with self._lock, self._conexao:
+            linha = self._conexao.execute(
+                "SELECT cursos FROM extracoes WHERE hash = ? AND base = ? AND filtro = ?", (hash_pagina, base, filtro)
+            ).fetchone()
+            if linha is None:
+                return None
+            self._conexao.execute(
+                "UPDATE extracoes SET usado_em = ? WHERE hash = ? AND base = ? AND filtro = ?", (time.time(), hash_pagina, base, filtro)
+            )
+        self.extracoes_reaproveitadas += 1
+        return [tuple(curso) for curso in json.loads(linha[0])]
+
+    def guardar_extracao(self, hash_pagina: str, base: str, filtro: str, cursos: List[tuple[str, str]]):
+        self.extracoes_novas += 1
+        with self._lock, self._conexao:
+            # O mesmo conteúdo sempre gera a mesma extração: se já existe, não há o que trocar.
+            inserida = self._conexao.execute(
+                "INSERT OR IGNORE INTO extracoes (hash, base, filtro, usado_em, cursos) VALUES (?, ?, ?, ?, ?)",
+                (hash_pagina, base, filtro, time.time(), json.dumps(cursos, ensure_ascii=False)),
+            ).rowcount
+            self._total_extracoes += inserida
+            excesso = self._total_extracoes - self.max_extracoes
+            if excesso > 0:
+                self._total_extracoes -= self._conexao.execute(
+                    "DELETE FROM extracoes WHERE (hash, base, filtro) IN "
+                    "(SELECT hash, base, filtro FROM extracoes ORDER BY usado_em LIMIT ?)",
+                    (excesso,),
+                ).rowcount
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            paginas = self._conexao.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+        return {
+            "paginas": paginas,
+            "bytes": self._bytes_total,
+            "max_bytes": self.max_bytes,
+            "extracoes": self._total_extracoes,
+            "hits_frescos": self.hits_frescos,
+            "revalidacoes": self.revalidacoes,
+            "nao_modificados": self.nao_modificados,
+            "bytes_economizados": self.bytes_economizados,
+            "extracoes_reaproveitadas": self.extracoes_reaproveitadas,
+            "extracoes_novas": self.extracoes_novas,
+            "evictions": self.evictions,
+        }
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
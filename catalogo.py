@@ -0,0 +1,47 @@
+from typing import Literal
+
+# Tabelas de sites e categorias compartilhadas pelo serviço de busca e pelos bots.
+# Este módulo só contém dados, para que os bots possam importá-lo sem carregar o motor de scraping.
+CourseType = Literal["free", "paid", "all"]
+
+# --- LISTA DE SITES E CATEGORIAS ---
+# "extrator" (opcional) ajusta a extração do site; ver extratores.Extrator. Sem ele, valem os links
+# cujo caminho tem o filtro seguido de um único segmento, sem query, na forma de normalizacao.url_canonica.
+# "url_gratis" (opcional, sites "mixed") é a listagem só de cursos gratuitos, usada nas buscas "free";
+# None marca um site misto sem essa listagem, que fica fora das buscas "free".
+SITES_DE_BUSCA = {
+    "Udemy": {"url": "https://www.udemy.com/courses/search/?q={}&sort=relevance",
+              "url_gratis": "https://www.udemy.com/courses/search/?price=price-free&q={}&sort=relevance", "base": "https://www.udemy.com", "filter": "/course/", "type": "mixed"},
+    "Coursera": {"url": "https://www.coursera.org/search?query={}", "base": "https://www.coursera.org", "filter": "/learn/", "type": "mixed",
+                 "extrator": {"caminho": r"/(?:learn|specializations|professional-certificates)/[^/?#]+/?(?:[?#]|$)"}},
+    "edX": {"url": "https://www.edx.org/search?q={}", "base": "https://www.edx.org", "filter": "/course/", "type": "mixed"},
+    "Digital Innovation One": {"url": "https://www.dio.me/browse?search={}", "base": "https://www.dio.me", "filter": "/curso/", "type": "free"},
+    "Fund. Bradesco Escola Virtual": {"url": "https://www.ev.org.br/catalogo-de-cursos?query={}", "base": "https://www.ev.org.br", "filter": "/curso/", "type": "free"},
+    "Udacity": {"url": "https://www.udacity.com/courses/all?search={}",
+                "url_gratis": "https://www.udacity.com/courses/all?price=Free&search={}", "base": "https://www.udacity.com", "filter": "/course/", "type": "mixed"},
+    "Alison": {"url": "https://alison.com/courses?query={}&category=it", "base": "https://alison.com", "filter": "/course/", "type": "free"},
+    "Khan Academy": {"url": "https://www.khanacademy.org/search?page_search_query={}", "base": "https://www.khanacademy.org", "filter": "/x/", "type": "free"},
+    "freeCodeCamp": {"url": "https://www.freecodecamp.org/news/search?query={}", "base": "https://www.freecodecamp.org/news", "filter": "/news/", "type": "free",
+                     "extrator": {"caminho": r"/news/(?!tag/|author/|search\b|page/)[^/?#]+/?(?:[?#]|$)"}},
+    "Alura": {"url": "https://www.alura.com.br/busca?query={}", "base": "https://www.alura.com.br", "filter": "/curso/", "type": "paid"},
+    "DataCamp": {"url": "https://www.datacamp.com/search?q={}", "base": "https://www.datacamp.com", "filter": "/courses/", "type": "paid"},
+    "Pluralsight": {"url": "https://www.pluralsight.com/search?q={}", "base": "https://www.pluralsight.com", "filter": "/courses/", "type": "paid"},
+    "Class Central": {"url": "https://www.classcentral.com/search?q={}", "base": "https://www.classcentral.com", "filter": "/course/", "type": "mixed"},
+    "FutureLearn": {"url": "https://www.futurelearn.com/search?q={}", "base": "https://www.futurelearn.com", "filter": "/courses/", "type": "mixed"},
+}
+SITES_PENTEST = {
+    "HackerSec": {"url": "https://hackersec.com/cursos-gratuitos/", "base": "https://hackersec.com", "filter": "/curso/", "type": "free"},
+    "Cybrary": {"url": "https://www.cybrary.it/catalog/all/", "url_gratis": "https://www.cybrary.it/catalog/free/", "base": "https://www.cybrary.it", "filter": "/course/", "type": "mixed"},
+    "Hack The Box Academy": {"url": "https://academy.hackthebox.com/catalogue", "url_gratis": None, "base": "https://academy.hackthebox.com",
+                             "filter": "/module/", "type": "mixed",
+                             "extrator": {"caminho": r"/module/(?:details/)?[^/?#]+/?(?:[?#]|$)"}},
+}
+MAPA_CATEGORIAS = {
+    "programacao": (["programação", "python", "javascript", "java"], "💻 Cursos de Programação"),
+    "redes": (["redes de computadores", "ccna", "infraestrutura"], "🌐 Cursos de Redes"),
+    "cloud": (["aws", "azure", "google cloud"], "☁️ Cursos de Cloud"),
+    "seguranca": (["segurança da informação", "pentest", "hacking etico"], "🛡️ Cursos de Segurança"),
+    "dados": (["sql", "banco de dados", "nosql"], "🗄️ Cursos de Banco de Dados"),
+    "ciencia_dados": (["ciencia de dados", "machine learning", "ia"], "📊 Cursos de Ciência de Dados"),
+    "devops": (["devops", "docker", "kubernetes"], "⚙️ Cursos de DevOps"),
+}
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import json
+import time
+import aiohttp
+from catalogo import CourseType
+from ranking import RANKING_TOP_K, RankingCursos
+from typing import AsyncIterator, List, Optional
+
+SERVICO_URL = os.getenv("ITBOOST_SERVICO_URL", "http://127.0.0.1:8750")  # "embutido" roda o motor no próprio processo
+SERVICO_SOCKET = os.getenv("ITBOOST_SERVICO_SOCKET", "")
+SERVICO_NOVA_TENTATIVA = 60
+
+
+class ClienteBusca:
+    """Cliente do serviço de busca (servico_busca.py) usado pelos dois bots.
+
+    Se o serviço não estiver no ar, as buscas caem para o motor embutido, carregado
+    sob demanda no próprio processo, e o serviço volta a ser tentado após
+    SERVICO_NOVA_TENTATIVA segundos.
+    """
+
+    def __init__(self, url: str = SERVICO_URL, socket: str = SERVICO_SOCKET):
+        self.url = "http://servico-busca" if socket else url.rstrip("/")
+        self.socket = socket
+        self._sessao: Optional[aiohttp.ClientSession] = None
+        self._motor = None
+        self._embutido_ate = float("inf") if url == "embutido" and not socket else 0.0
+
+    def _obter_sessao(self) -> aiohttp.ClientSession:
+        if self._sessao is None or self._sessao.closed:
+            conector = aiohttp.UnixConnector(path=self.socket) if self.socket else aiohttp.TCPConnector(limit=0)
+            self._sessao = aiohttp.ClientSession(
+                connector=conector,
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=2, sock_read=60),
+            )
+        return self._sessao
+
+    async def _motor_embutido(self):
+        if self._motor is None:
+            import servico_busca
+            await servico_busca.iniciar_motor()
+            self._motor = servico_busca
+        return self._motor
+
+    async def pesquisar_stream(self, termos: List[str], course_type: CourseType = "all", incluir_pentest: bool = False) -> AsyncIterator[tuple[str, List[tuple[str, str]]]]:
+        """Entrega (site, cursos) conforme cada site responde, vindo do serviço ou do motor embutido.
+
+        Erros do serviço não chegam ao bot: antes do primeiro site a busca passa
+        para o motor embutido; depois dele o stream termina com o que já chegou.
+        """
+        termos = [termo for termo in termos if termo.strip()]
+        if not termos and not incluir_pentest:
+            return
+        if time.monotonic() >= self._embutido_ate:
+            parametros = [("termo", termo) for termo in termos] + [("tipo", course_type)]
+            if incluir_pentest:
+                parametros.append(("pentest", "1"))
+            try:
+                resposta = await self._obter_sessao().get(f"{self.url}/buscar", params=parametros)
+            except aiohttp.ClientConnectionError as e:
+                print(f"Serviço de busca indisponível ({e}); usando o motor embutido.")
+                self._embutido_ate = time.monotonic() + SERVICO_NOVA_TENTATIVA
+            else:
+                entregues = 0
+                try:
+                    async with resposta:
+                        resposta.raise_for_status()
+                        async for linha in resposta.content:
+                            if linha.strip():
+                                dado = json.loads(linha)
+                                entregues += 1
+                                yield dado["site"], [tuple(curso) for curso in dado["cursos"]]
+                    return
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    if entregues:
+                        print(f"Busca interrompida pelo serviço após {entregues} sites ({e}).")
+                        return
+                    print(f"Serviço de busca falhou ({e}); usando o motor embutido nesta busca.")
+        motor = await self._motor_embutido()
+        stream = motor.buscar_stream(termos, course_type, incluir_pentest)
+        try:
+            async for item in stream:
+                yield item
+        finally:
+            await stream.aclose()
+
+    async def pesquisar(self, termos: List[str], course_type: CourseType = "all", incluir_pentest: bool = False,
+                        limite: int = RANKING_TOP_K) -> List[tuple[str, str]]:
+        """Os `limite` cursos mais relevantes para os termos, do melhor para o pior."""
+        ranking = RankingCursos(termos, limite)
+        async for site, cursos_site in self.pesquisar_stream(termos, course_type, incluir_pentest):
+            ranking.adicionar(site, cursos_site)
+        return ranking.resultados()
+
+    async def fechar(self):
+        if self._sessao is not None and not self._sessao.closed:
+            await self._sessao.close()
+        if self._motor is not None:
+            await self._motor.encerrar_motor()
+            self._motor = None
@@ -0,0 +1,167 @@
+import hashlib
+import re
+import time
+import urllib.parse
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from bs4 import BeautifulSoup
+
+from catalogo import SITES_DE_BUSCA, SITES_PENTEST
+from normalizacao import VERSAO_CANONICA, url_canonica
+
+try:
+    import lxml  # noqa: F401
+    PARSER_HTML = "lxml"
+except ImportError:
+    PARSER_HTML = "html.parser"
+
+FONTES_TITULO = ("cabecalho", "texto", "title", "alt", "slug")
+TITULO_MINIMO = 5
+# Textos de botões que acompanham o cartão do curso e não servem como título.
+TEXTOS_GENERICOS = {
+    "ver curso", "ver mais", "saiba mais", "acessar", "acessar curso", "inscreva-se", "matricule-se",
+    "learn more", "view course", "enroll", "enroll now", "start learning", "read more", "details",
+}
+_CABECALHOS = ("h1", "h2", "h3", "h4", "h5", "h6")
+# Blocos <script>/<style> (o estado JSON das páginas costuma ser a maior parte do HTML) saem antes do
+# parser: nunca contêm links de curso e tokenizá-los custa mais que o resto da página.
+_BLOCOS_SEM_LINKS = re.compile(r"<(script|style)\b[^>]*>[^<]*(?:<(?!/\1)[^<]*)*</\1\s*>", re.IGNORECASE)
+_ANCORA = re.compile(r"<a\s[^>]*>.*?</a\s*>", re.IGNORECASE | re.DOTALL)
+_HREF = re.compile(r"""\shref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+
+
+def _titulo_do_slug(caminho: str) -> str:
+    slug = urllib.parse.unquote(caminho.rstrip("/").rsplit("/", 1)[-1])
+    return slug.replace("-", " ").replace("_", " ").title()
+
+
+def _primeira_tag(a, nomes: Sequence[str]):
+    # Percorrer os descendentes direto sai mais barato que find(), que monta um filtro a cada chamada.
+    for elemento in a.descendants:
+        if elemento.name in nomes:
+            return elemento
+    return None
+
+
+def _texto_valido(texto: Optional[str]) -> Optional[str]:
+    texto = " ".join((texto or "").split())
+    if len(texto) < TITULO_MINIMO or texto.lower() in TEXTOS_GENERICOS:
+        return None
+    return texto
+
+
+class Extrator:
+    """Extração dos links de curso de uma página de resultados, compilada a partir da especificação do site.
+
+    `caminho` é uma regex procurada no href (por padrão, o filtro do catálogo
+    seguido de um único segmento). As tags <a> que casam com ela são recortadas
+    do HTML por regex e só esses trechos passam pelo BeautifulSoup; o resto da
+    página nunca vira árvore. `titulo` dá as fontes do título em ordem de
+    preferência e `query` os parâmetros preservados antes de a URL passar por
+    normalizacao.url_canonica.
+    """
+
+    def __init__(self, base: str, filtro: str, caminho: Optional[str] = None, titulo: Sequence[str] = FONTES_TITULO,
+                 query: Sequence[str] = ()):
+        invalidas = set(titulo) - set(FONTES_TITULO)
+        if invalidas:
+            raise ValueError(f"Fontes de título inválidas para {base}: {sorted(invalidas)}")
+        self.base = base
+        partes = urllib.parse.urlsplit(base)
+        self.host = partes.netloc
+        self._origem = f"{partes.scheme}://{partes.netloc}"
+        self.padrao = re.compile(caminho or re.escape(filtro) + r"[^/?#]+/?(?:[?#]|$)")
+        self.fontes_titulo = tuple(titulo)
+        self.query = frozenset(query)
+        especificacao = repr((self.padrao.pattern, self.fontes_titulo, sorted(self.query), VERSAO_CANONICA, PARSER_HTML))
+        # Entra na chave das extrações memorizadas: mudar a especificação invalida as antigas.
+        self.assinatura = hashlib.blake2b(especificacao.encode(), digest_size=6).hexdigest()
+
+    def _recortar_ancoras(self, html: str) -> str:
+        trechos = []
+        for ancora in _ANCORA.finditer(_BLOCOS_SEM_LINKS.sub("", html)):
+            trecho = ancora.group()
+            href = _HREF.search(trecho, 0, trecho.find(">") + 1)
+            if href and self.padrao.search(href.group(1) or href.group(2) or href.group(3)):
+                trechos.append(trecho)
+        return "".join(trechos)
+
+    def canonizar(self, href: str) -> Optional[str]:
+        href = href.strip()
+        # Caminho absoluto é o caso comum e dispensa o urljoin.
+        absoluto = self._origem + href if href.startswith("/") and not href.startswith("//") else urllib.parse.urljoin(self.base, href)
+        partes = urllib.parse.urlsplit(absoluto)
+        if partes.netloc != self.host or partes.scheme not in ("http", "https"):
+            return None
+        query = ""
+        if self.query:
+            query = urllib.parse.urlencode([
+                (chave, valor) for chave, valor in urllib.parse.parse_qsl(partes.query) if chave in self.query
+            ])
+        return url_canonica(urllib.parse.urlunsplit((partes.scheme, partes.netloc, partes.path, query, "")))
+
+    def _titulo(self, a, link: str) -> Tuple[Optional[str], bool]:
+        """Título do link e se ele veio da página (False quando sai do slug da URL)."""
+        for fonte in self.fontes_titulo:
+            if fonte == "cabecalho":
+                cabecalho = _primeira_tag(a, _CABECALHOS)
+                texto = cabecalho.get_text(" ", strip=True) if cabecalho else None
+            elif fonte == "texto":
+                texto = a.get_text(" ", strip=True)
+            elif fonte == "title":
+                texto = a.get("title")
+            elif fonte == "alt":
+                imagem = _primeira_tag(a, ("img",))
+                texto = imagem.get("alt") if imagem else None
+            else:
+                return _titulo_do_slug(urllib.parse.urlsplit(link).path) or None, False
+            texto = _texto_valido(texto)
+            if texto:
+                return texto, True
+        return None, False
+
+    def extrair(self, html: str) -> List[tuple[str, str]]:
+        trechos = self._recortar_ancoras(html)
+        if not trechos:
+            return []
+        soup = BeautifulSoup(trechos, PARSER_HTML)
+        # Um curso costuma ter vários links (cartão, imagem, botão): fica o primeiro título tirado da página.
+        titulos: Dict[str, Tuple[str, bool]] = {}
+        for a in soup.find_all("a", href=True):
+            link = self.canonizar(a["href"])
+            if link is None:
+                continue
+            anterior = titulos.get(link)
+            if anterior is not None and anterior[1]:
+                continue
+            titulo, da_pagina = self._titulo(a, link)
+            if titulo and (anterior is None or da_pagina):
+                titulos[link] = (titulo, da_pagina)
+        return [(titulo, link) for link, (titulo, _) in titulos.items()]
+
+
+def _compilar_catalogo() -> Dict[Tuple[str, str], Extrator]:
+    extratores = {}
+    for dados in (*SITES_DE_BUSCA.values(), *SITES_PENTEST.values()):
+        chave = (dados["base"], dados["filter"])
+        extratores[chave] = Extrator(*chave, **dados.get("extrator", {}))
+    return extratores
+
+
+# Compilados uma vez, na importação (também em cada processo do pool de parsing).
+_extratores = _compilar_catalogo()
+
+
+def extrator_para(base: str, filtro: str) -> Extrator:
+    """Extrator do site; pares fora do catálogo ganham um extrator padrão, compilado uma única vez."""
+    extrator = _extratores.get((base, filtro))
+    if extrator is None:
+        extrator = _extratores[(base, filtro)] = Extrator(base, filtro)
+    return extrator
+
+
+def extrair_medido(html: str, base: str, filtro: str) -> Tuple[List[tuple[str, str]], float]:
+    """Extração com o tempo gasto medido no próprio worker; é o que roda no pool de processos do serviço."""
+    inicio = time.perf_counter()
+    cursos = extrator_para(base, filtro).extrair(html)
+    return cursos, time.perf_counter() - inicio
@@ -0,0 +1,177 @@
+"""Implantação em escala: um serviço de busca compartilhado e vários processos do bot do Discord, com sharding.
+
+O serviço de busca (servico_busca.py) sobe uma vez, num socket Unix local, com
+o pool de parsing em processos (ITBOOST_PARSE_POOL=process). Ele continua
+sendo o único dono do cache de resultados, do single-flight e dos limites de
+taxa por domínio, então todos os bots compartilham esses estados pelo socket.
+Depois sobem ITBOOST_PROCESSOS_BOT processos do ITBOOST.py, cada um com um
+AutoShardedBot atendendo uma faixa contígua dos shards e o próprio endpoint
+/metrics (ITBOOST_METRICAS_PORTA + índice do processo). Processos que caem são
+reiniciados com espera crescente (os que saem com código 0 não voltam);
+SIGINT/SIGTERM encerram tudo, bots primeiro. O bot do Telegram, se incluído,
+usa a porta de métricas seguinte à do último processo do Discord.
+
+    ITBOOST_PROCESSOS_BOT=2 ITBOOST_SHARDS=auto python implantacao.py
+"""
+import asyncio
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+TOKEN = os.getenv("DISCORD_TOKEN", "")
+PROCESSOS_BOT = int(os.getenv("ITBOOST_PROCESSOS_BOT", "1"))
+SHARDS = os.getenv("ITBOOST_SHARDS", "auto")  # "auto" pergunta ao Discord quantos shards usar
+SERVICO_SOCKET = os.path.abspath(os.getenv("ITBOOST_SERVICO_SOCKET", "itboost_busca.sock"))
+PARSE_WORKERS = os.getenv("ITBOOST_PARSE_WORKERS", str(os.cpu_count() or 1))
+METRICAS_PORTA = int(os.getenv("ITBOOST_METRICAS_PORTA", "9101"))  # 0 desliga o /metrics de todos os bots
+COM_TELEGRAM = os.getenv("ITBOOST_IMPLANTACAO_TELEGRAM", "0") == "1"
+ESPERA_SERVICO = float(os.getenv("ITBOOST_IMPLANTACAO_ESPERA_SERVICO", "30"))
+REINICIO_ESPERA_MAXIMA = 60.0
+PRAZO_ENCERRAMENTO = 10.0
+URL_GATEWAY = "https://discord.com/api/v10/gateway/bot"
+
+
+async def total_de_shards() -> int:
+    if SHARDS != "auto":
+        return int(SHARDS)
+    import aiohttp
+    async with aiohttp.ClientSession() as sessao:
+        async with sessao.get(URL_GATEWAY, headers={"Authorization": f"Bot {TOKEN}"}) as resposta:
+            resposta.raise_for_status()
+            return (await resposta.json())["shards"]
+
+
+def dividir_shards(total: int, processos: int) -> List[List[int]]:
+    """Faixas contíguas de shards, uma por processo, com tamanhos que diferem em no máximo um."""
+    processos = max(1, min(processos, total))
+    base, sobra = divmod(total, processos)
+    faixas, inicio = [], 0
+    for indice in range(processos):
+        fim = inicio + base + (indice < sobra)
+        faixas.append(list(range(inicio, fim)))
+        inicio = fim
+    return faixas
+
+
+class Processo:
+    """Um processo filho supervisionado: reiniciado com espera crescente sempre que cai.
+
+    Uma saída com código 0 é deliberada (por exemplo, o bot sem token configurado) e encerra a supervisão.
+    """
+
+    def __init__(self, nome: str, script: str, ambiente: Dict[str, str]):
+        self.nome = nome
+        self.script = script
+        self.ambiente = {**os.environ, **ambiente}
+        self._processo: Optional[asyncio.subprocess.Process] = None
+        self._parando = False
+
+    async def iniciar(self):
+        self._processo = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(DIRETORIO, self.script), env=self.ambiente
+        )
+        print(f"[{self.nome}] iniciado (pid {self._processo.pid})")
+
+    async def supervisionar(self):
+        espera = 1.0
+        while True:
+            inicio = time.monotonic()
+            codigo = await self._processo.wait()
+            if self._parando:
+                return
+            if codigo == 0:
+                print(f"[{self.nome}] terminou normalmente; não será reiniciado")
+                return
+            # Um processo que ficou de pé por um bom tempo volta a ter a espera mínima.
+            if time.monotonic() - inicio > REINICIO_ESPERA_MAXIMA:
+                espera = 1.0
+            print(f"[{self.nome}] terminou com código {codigo}; reiniciando em {espera:.0f}s")
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, REINICIO_ESPERA_MAXIMA)
+            if self._parando:
+                return
+            await self.iniciar()
+
+    async def parar(self):
+        self._parando = True
+        if self._processo is None or self._processo.returncode is not None:
+            return
+        self._processo.terminate()
+        try:
+            await asyncio.wait_for(self._processo.wait(), PRAZO_ENCERRAMENTO)
+        except asyncio.TimeoutError:
+            print(f"[{self.nome}] não encerrou em {PRAZO_ENCERRAMENTO:.0f}s; forçando")
+            self._processo.kill()
+            await self._processo.wait()
+
+
+async def esperar_socket(caminho: str, prazo: float):
+    limite = time.monotonic() + prazo
+    while True:
+        try:
+            _, escritor = await asyncio.open_unix_connection(caminho)
+            escritor.close()
+            await escritor.wait_closed()
+            return
+        except OSError:
+            if time.monotonic() > limite:
+                raise TimeoutError(f"Serviço de busca não respondeu em {caminho} após {prazo:.0f}s.")
+            await asyncio.sleep(0.2)
+
+
+async def main():
+    faixas = dividir_shards(await total_de_shards(), PROCESSOS_BOT)
+    total = faixas[-1][-1] + 1
+    print(f"{total} shards em {len(faixas)} processo(s) do bot: {faixas}")
+
+    servico = Processo("servico", "servico_busca.py", {
+        "ITBOOST_SERVICO_SOCKET": SERVICO_SOCKET,
+        "ITBOOST_PARSE_POOL": "process",
+        "ITBOOST_PARSE_WORKERS": PARSE_WORKERS,
+    })
+    bots = [
+        Processo(f"bot-{indice}", "ITBOOST.py", {
+            "ITBOOST_SHARDS": str(total),
+            "ITBOOST_SHARD_IDS": ",".join(map(str, faixa)),
+            "ITBOOST_SERVICO_SOCKET": SERVICO_SOCKET,
+            "ITBOOST_METRICAS_PORTA": str(METRICAS_PORTA + indice if METRICAS_PORTA else 0),
+        })
+        for indice, faixa in enumerate(faixas)
+    ]
+    if COM_TELEGRAM:
+        bots.append(Processo("telegram", "telegram-bot.py", {
+            "ITBOOST_SERVICO_SOCKET": SERVICO_SOCKET,
+            "TELEGRAM_METRICAS_PORTA": str(METRICAS_PORTA + len(faixas) if METRICAS_PORTA else 0),
+        }))
+
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sinal, parar.set)
+
+    if os.path.exists(SERVICO_SOCKET):
+        os.unlink(SERVICO_SOCKET)  # socket órfão de uma execução anterior
+    await servico.iniciar()
+    supervisores = [asyncio.create_task(servico.supervisionar())]
+    try:
+        await esperar_socket(SERVICO_SOCKET, ESPERA_SERVICO)
+        for bot in bots:
+            await bot.iniciar()
+            supervisores.append(asyncio.create_task(bot.supervisionar()))
+        await parar.wait()
+        print("Encerrando...")
+    finally:
+        await asyncio.gather(*(bot.parar() for bot in bots))
+        await servico.parar()
+        for supervisor in supervisores:
+            supervisor.cancel()
+
+
+if __name__ == "__main__":
+    if SHARDS == "auto" and not TOKEN:
+        print("ERRO CRÍTICO: DISCORD_TOKEN não configurado (necessário para ITBOOST_SHARDS=auto)!")
+    else:
+        asyncio.run(main())
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+def normalizar_termo(termo: str) -> str:
+    return " ".join(termo.strip().lower().split())
+
+
+class IndiceCursos:
+    """Índice local (SQLite + FTS5) dos cursos encontrados pelo crawler.
+
+    Cada par (site, termo) rastreado fica registrado em `consultas` com o horário
+    da última atualização; os cursos ficam em `cursos`, espelhados na tabela FTS
+    `cursos_fts` para busca por palavras no título. Os métodos são síncronos e
+    seguros entre threads; o bot os chama via asyncio.to_thread.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._criar_tabelas()
+
+    def _criar_tabelas(self):
+        with self._lock, self._conexao:
+            self._conexao.executescript('''
+                CREATE TABLE IF NOT EXISTS consultas (
+                    site TEXT NOT NULL, termo TEXT NOT NULL,
+                    atualizado_em REAL NOT NULL, quantidade INTEGER NOT NULL,
+                    PRIMARY KEY (site, termo)
+                );
+                CREATE TABLE IF NOT EXISTS cursos (
+                    id INTEGER PRIMARY KEY, site TEXT NOT NULL, termo TEXT NOT NULL,
+                    posicao INTEGER NOT NULL, titulo TEXT NOT NULL, url TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_cursos_termo_site ON cursos (termo, site, posicao);
+                CREATE VIRTUAL TABLE IF NOT EXISTS cursos_fts USING fts5(
+                    titulo, content='cursos', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS cursos_ai AFTER INSERT ON cursos BEGIN
+                    INSERT INTO cursos_fts (rowid, titulo) VALUES (new.id, new.titulo);
+                END;
+                CREATE TRIGGER IF NOT EXISTS cursos_ad AFTER DELETE ON cursos BEGIN
+                    INSERT INTO cursos_fts (cursos_fts, rowid, titulo) VALUES ('delete', old.id, old.titulo);
+                END;
+            ''')
+
+    def substituir(self, site: str, termo: str, cursos: List[tuple[str, str]]):
+        """Troca os cursos indexados de (site, termo) pelo resultado mais recente."""
+        termo = normalizar_termo(termo)
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM cursos WHERE termo = ? AND site = ?", (termo, site))
+            self._conexao.executemany(
+                "INSERT INTO cursos (site, termo, posicao, titulo, url) VALUES (?, ?, ?, ?, ?)",
+                [(site, termo, i, titulo, url) for i, (titulo, url) in enumerate(cursos)],
+            )
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO consultas (site, termo, atualizado_em, quantidade) VALUES (?, ?, ?, ?)",
+                (site, termo, time.time(), len(cursos)),
+            )
+
+    def consultar(self, termo: str, sites: Iterable[str], idade_maxima: float) -> Dict[str, List[tuple[str, str]]]:
+        """Retorna os cursos dos sites cujo par (site, termo) foi atualizado há menos de `idade_maxima` segundos."""
+        termo = normalizar_termo(termo)
+        sites = list(sites)
+        if not sites:
+            return {}
+        marcadores = ",".join("?" * len(sites))
+        with self._lock:
+            frescos = [
+                linha[0] for linha in self._conexao.execute(
+                    f"SELECT site FROM consultas WHERE termo = ? AND site IN ({marcadores}) AND atualizado_em >= ?",
+                    (termo, *sites, time.time() - idade_maxima),
+                )
+            ]
+            resultado: Dict[str, List[tuple[str, str]]] = {site: [] for site in frescos}
+            if frescos:
+                marcadores = ",".join("?" * len(frescos))
+                for site, titulo, url in self._conexao.execute(
+                    f"SELECT site, titulo, url FROM cursos WHERE termo = ? AND site IN ({marcadores}) ORDER BY site, posicao",
+                    (termo, *frescos),
+                ):
+                    resultado[site].append((titulo, url))
+        return resultado
+
+    def buscar_texto(self, consulta: str, sites: Iterable[str], limite: int) -> List[tuple[str, str]]:
+        """Busca por palavras nos títulos indexados, ordenando por relevância (bm25)."""
+        palavras = normalizar_termo(consulta).split()
+        sites = list(sites)
+        if not palavras or not sites:
+            return []
+        expressao = " ".join('"' + p.replace('"', '""') + '"' for p in palavras)
+        marcadores = ",".join("?" * len(sites))
+        with self._lock:
+            linhas = self._conexao.execute(
+                f'''SELECT c.titulo, c.url FROM cursos_fts
+                    JOIN cursos c ON c.id = cursos_fts.rowid
+                    WHERE cursos_fts MATCH ? AND c.site IN ({marcadores})
+                    ORDER BY bm25(cursos_fts) LIMIT ?''',
+                (expressao, *sites, limite * 4),
+            ).fetchall()
+        return list(dict.fromkeys(linhas))[:limite]
+
+    def pendentes(self, pares: Iterable[tuple[str, str]], idade_refresh: float) -> List[tuple[str, str]]:
+        """Filtra os pares (site, termo) nunca indexados ou mais velhos que `idade_refresh`."""
+        limite = time.time() - idade_refresh
+        with self._lock:
+            atualizados = {
+                (site, termo) for site, termo in self._conexao.execute(
+                    "SELECT site, termo FROM consultas WHERE atualizado_em >= ?", (limite,)
+                )
+            }
+        return [(site, termo) for site, termo in pares if (site, normalizar_termo(termo)) not in atualizados]
+
+    def estatisticas(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            consultas, mais_antiga, mais_recente = self._conexao.execute(
+                "SELECT COUNT(*), MIN(atualizado_em), MAX(atualizado_em) FROM consultas"
+            ).fetchone()
+            total_cursos = self._conexao.execute("SELECT COUNT(*) FROM cursos").fetchone()[0]
+        agora = time.time()
+        return {
+            "consultas": consultas,
+            "cursos": total_cursos,
+            "idade_mais_antiga_s": agora - mais_antiga if mais_antiga else None,
+            "idade_mais_recente_s": agora - mais_recente if mais_recente else None,
+            "tamanho_bytes": sum(
+                os.path.getsize(arquivo) for arquivo in (self.caminho, self.caminho + "-wal") if os.path.exists(arquivo)
+            ),
+        }
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
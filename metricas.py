@@ -0,0 +1,162 @@
+"""Contadores e histogramas em memória, exportados no formato de texto do Prometheus.
+
+Registrar uma observação custa uma busca em dicionário e uma bisseção; o texto só
+é montado quando alguém lê o endpoint. As observações são feitas sempre na thread
+do event loop, por isso não há lock.
+"""
+import asyncio
+import bisect
+import functools
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+T = TypeVar("T")
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BUCKETS_QUANTIDADE = (0, 1, 5, 10, 20, 50, 100, 200, 500, 1000)
+_registro: List["_Metrica"] = []
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(nomes: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._series: Dict[tuple, object] = {}
+        _registro.append(self)
+
+    def _exportar_series(self) -> List[str]:
+        raise NotImplementedError
+
+    def exportar(self) -> str:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas += self._exportar_series()
+        return "\n".join(linhas)
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, *rotulos: str, quantidade: float = 1.0):
+        self._series[rotulos] = self._series.get(rotulos, 0.0) + quantidade
+
+    def _exportar_series(self) -> List[str]:
+        return [f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {valor}" for chave, valor in self._series.items()]
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_LATENCIA):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor: float, *rotulos: str):
+        serie = self._series.get(rotulos)
+        if serie is None:
+            # [contagem por bucket (o último é +Inf), soma, total]
+            serie = self._series[rotulos] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        serie[0][bisect.bisect_left(self.buckets, valor)] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+    def _exportar_series(self) -> List[str]:
+        linhas = []
+        for chave, (contagens, soma, total) in self._series.items():
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float("inf"),), contagens):
+                acumulado += contagem
+                le = "+Inf" if limite == float("inf") else repr(float(limite))
+                rotulos = _formatar_rotulos(self.rotulos, chave, f'le="{le}"')
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(self.rotulos, chave)} {soma}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(self.rotulos, chave)} {total}")
+        return linhas
+
+
+def exportar() -> str:
+    return "\n".join(metrica.exportar() for metrica in _registro) + "\n"
+
+
+async def rota_metricas(request: "web.Request") -> "web.Response":
+    # aiohttp.web só é importado quando alguém serve /metrics: o import custa ~80 ms na partida dos bots.
+    from aiohttp import web
+    return web.Response(body=exportar().encode(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+# --- MÉTRICAS COMUNS AOS PROCESSOS ---
+COMANDO_SEGUNDOS = Histograma(
+    "itboost_comando_segundos", "Duração dos handlers de comandos e componentes, do início ao fim.", ("bot", "comando", "resultado")
+)
+LOOP_ATRASO_SEGUNDOS = Histograma(
+    "itboost_loop_atraso_segundos", "Atraso do event loop em relação ao agendado.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def medir_comando(bot: str, comando: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorador que registra a duração de um handler assíncrono em COMANDO_SEGUNDOS."""
+    def decorador(handler: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(handler)
+        async def medido(*args, **kwargs) -> T:
+            inicio = time.perf_counter()
+            resultado = "erro"
+            try:
+                retorno = await handler(*args, **kwargs)
+                resultado = "ok"
+                return retorno
+            finally:
+                COMANDO_SEGUNDOS.observar(time.perf_counter() - inicio, bot, comando, resultado)
+        return medido
+    return decorador
+
+
+async def monitorar_loop(intervalo: float = 0.25):
+    """Mede continuamente quanto o event loop se atrasa para acordar uma tarefa agendada."""
+    loop = asyncio.get_running_loop()
+    while True:
+        inicio = loop.time()
+        await asyncio.sleep(intervalo)
+        LOOP_ATRASO_SEGUNDOS.observar(max(0.0, loop.time() - inicio - intervalo))
+
+
+class ServidorMetricas:
+    """Endpoint HTTP local (GET /metrics) e monitor do event loop de um processo."""
+
+    def __init__(self, host: str, porta: int):
+        self.host = host
+        self.porta = porta
+        self._runner = None
+        self._monitor: Optional[asyncio.Task] = None
+
+    async def iniciar(self):
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get("/metrics", rota_metricas)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.porta).start()
+        self._monitor = asyncio.create_task(monitorar_loop())
+
+    async def encerrar(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,122 @@
+import re
+import struct
+import unicodedata
+import urllib.parse
+import zlib
+from typing import Iterable, Optional, Tuple
+
+# Sobe quando as regras de url_canonica mudam, para invalidar o que foi memorizado com as antigas.
+VERSAO_CANONICA = 1
+PARAMETROS_RASTREAMENTO = {
+    "ref", "referrer", "referral", "src", "source", "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid",
+    "trk", "tracking", "affcode", "ranmid", "raneaid", "ransiteid", "irclickid", "irgwc", "igshid", "_hsenc", "_hsmi",
+}
+PORTAS_PADRAO = {"http": 80, "https": 443}
+ASSINATURA_HASHES = 64
+LIMIAR_QUASE_DUPLICADO = 0.9
+_VAZIO = 0xFFFFFFFF
+_FORMATO_ASSINATURA = f"<{ASSINATURA_HASHES}I"
+_CARACTERES_SEGUROS = "/-._~!$&'()*+,;=:@"
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas sem acentos: "Programação" e "programacao" viram o mesmo texto."""
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+
+
+def _rastreamento(parametro: str) -> bool:
+    parametro = parametro.lower()
+    return parametro.startswith("utm_") or parametro in PARAMETROS_RASTREAMENTO
+
+
+def url_canonica(url: str) -> str:
+    """Forma única de uma URL de curso, usada para comparar e para gravar.
+
+    Esquema e host em minúsculas, sem porta padrão, sem fragmento, sem parâmetros
+    de rastreamento (utm_*, ref, gclid...), com os demais parâmetros ordenados,
+    escapes do caminho uniformizados e sem barras repetidas ou barra final.
+    """
+    url = url.strip()
+    try:
+        partes = urllib.parse.urlsplit(url)
+        porta = partes.port
+    except ValueError:
+        return url
+    esquema = partes.scheme.lower()
+    host = (partes.hostname or "").lower()
+    if porta is not None and PORTAS_PADRAO.get(esquema) != porta:
+        host = f"{host}:{porta}"
+    caminho = urllib.parse.quote(urllib.parse.unquote(re.sub(r"/{2,}", "/", partes.path)), safe=_CARACTERES_SEGUROS)
+    caminho = caminho.rstrip("/") or "/"
+    parametros = sorted(
+        (chave, valor) for chave, valor in urllib.parse.parse_qsl(partes.query, keep_blank_values=True) if not _rastreamento(chave)
+    )
+    return urllib.parse.urlunsplit((esquema, host, caminho, urllib.parse.urlencode(parametros), ""))
+
+
+def host_da_url(url: str) -> str:
+    return urllib.parse.urlsplit(url).netloc
+
+
+def slug_da_url(url: str) -> str:
+    """Último segmento do caminho: "/learn/python-101" e "/course/python-101" têm o mesmo slug."""
+    return urllib.parse.urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _shingles(titulo: str) -> Iterable[bytes]:
+    texto = " ".join(re.findall(r"[a-z0-9]+", normalizar_texto(titulo)))
+    if len(texto) <= 3:
+        return (texto.encode(),) if texto else ()
+    return {texto[i:i + 3].encode() for i in range(len(texto) - 2)}
+
+
+def assinatura_titulo(titulo: str) -> Optional[bytes]:
+    """MinHash dos trigramas de caracteres do título: 64 inteiros de 32 bits (256 bytes).
+
+    Usa um único hash por trigrama (one-permutation hashing): os bits baixos do
+    crc32 escolhem a posição e o restante disputa o mínimo dela. A fração de
+    posições iguais entre duas assinaturas estima a similaridade de Jaccard
+    entre os títulos. O crc32 é estável entre processos.
+    """
+    shingles = _shingles(titulo)
+    if not shingles:
+        return None
+    minimos = [_VAZIO] * ASSINATURA_HASHES
+    for shingle in shingles:
+        valor, posicao = divmod(zlib.crc32(shingle), ASSINATURA_HASHES)
+        if valor < minimos[posicao]:
+            minimos[posicao] = valor
+    return struct.pack(_FORMATO_ASSINATURA, *minimos)
+
+
+def similaridade(a: Optional[bytes], b: Optional[bytes]) -> float:
+    if a is None or b is None or len(a) != len(b):
+        return 0.0
+    iguais = comparadas = 0
+    for x, y in zip(struct.unpack(_FORMATO_ASSINATURA, a), struct.unpack(_FORMATO_ASSINATURA, b)):
+        # Posições vazias nas duas (títulos curtos) não dizem nada sobre a similaridade.
+        if x != _VAZIO or y != _VAZIO:
+            comparadas += 1
+            iguais += x == y
+    return iguais / comparadas if comparadas else 0.0
+
+
+def mesmo_curso(url_a: str, assinatura_a: Optional[bytes], url_b: str, assinatura_b: Optional[bytes]) -> bool:
+    """Duas entradas (URLs já canônicas) são o mesmo curso: mesma URL, ou mesmo site e slug com títulos quase iguais.
+
+    Só serve para juntar resultados de busca; nunca para apagar dados gravados.
+    Títulos parecidos com slugs diferentes ("machine-learning-i" e "-ii", "modulo-1"
+    e "modulo-2") são cursos distintos, assim como títulos parecidos em outros sites.
+    """
+    if url_a == url_b:
+        return True
+    return (
+        host_da_url(url_a) == host_da_url(url_b)
+        and slug_da_url(url_a) == slug_da_url(url_b)
+        and similaridade(assinatura_a, assinatura_b) >= LIMIAR_QUASE_DUPLICADO
+    )
+
+
+def algum_mesmo_curso(url: str, assinatura: Optional[bytes], existentes: Iterable[Tuple[str, Optional[bytes]]]) -> bool:
+    return any(mesmo_curso(url, assinatura, outra_url, outra_assinatura) for outra_url, outra_assinatura in existentes)
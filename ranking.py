@@ -0,0 +1,117 @@
+import heapq
+import itertools
+import os
+import re
+import urllib.parse
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from normalizacao import algum_mesmo_curso, assinatura_titulo, host_da_url, normalizar_texto, url_canonica
+
+RANKING_TOP_K = int(os.getenv("ITBOOST_RANKING_TOP_K", "50"))
+RANKING_PENALIDADE_POSICAO = float(os.getenv("ITBOOST_RANKING_PENALIDADE_POSICAO", "0.02"))
+PESO_URL = 0.6  # termos que só aparecem no slug da URL valem menos que no título
+BONUS_FRASE = 0.25
+BONUS_TERMO_EXTRA = 0.1
+PALAVRAS_VAZIAS = {
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "para", "com", "um", "uma",
+    "the", "of", "and", "for", "to", "in", "on", "with", "an",
+}
+_PALAVRA = re.compile(r"[a-z0-9]+")
+
+
+def tokenizar(texto: str) -> List[str]:
+    return [palavra for palavra in _PALAVRA.findall(normalizar_texto(texto)) if palavra not in PALAVRAS_VAZIAS]
+
+
+class _Termo:
+    __slots__ = ("tokens", "frase")
+
+    def __init__(self, termo: str):
+        tokens = tokenizar(termo)
+        self.tokens = frozenset(tokens)
+        self.frase = " ".join(tokens)
+
+
+def pontuar(titulo: str, url: str, termos: Iterable[_Termo]) -> float:
+    """Relevância de um curso para a busca: cobertura do melhor termo, mais um bônus por termo extra encontrado."""
+    tokens_titulo = tokenizar(titulo)
+    no_titulo = set(tokens_titulo)
+    frase_titulo = " ".join(tokens_titulo)
+    na_url = set(tokenizar(urllib.parse.unquote(urllib.parse.urlsplit(url).path)))
+    melhor, encontrados = 0.0, 0
+    for termo in termos:
+        if not termo.tokens:
+            continue
+        cobertura = max(
+            len(termo.tokens & no_titulo) / len(termo.tokens),
+            PESO_URL * len(termo.tokens & na_url) / len(termo.tokens),
+        )
+        if cobertura and len(termo.tokens) > 1 and termo.frase in frase_titulo:
+            cobertura += BONUS_FRASE
+        if cobertura:
+            encontrados += 1
+            melhor = max(melhor, cobertura)
+    return melhor + BONUS_TERMO_EXTRA * max(0, encontrados - 1)
+
+
+class RankingCursos:
+    """Os `limite` cursos mais relevantes de uma busca, mantidos num heap enquanto os sites respondem.
+
+    Cada curso recebe a relevância em relação aos termos (todos os termos de uma
+    categoria de MAPA_CATEGORIAS contam) menos uma penalidade pela posição dele
+    na lista do próprio site. Com relevâncias parecidas, o primeiro resultado de
+    cada site passa à frente do décimo de outro, e os sites se intercalam. Só
+    os `limite` melhores ficam em memória; posições de um site além do limite
+    nem chegam a ser pontuadas.
+
+    As URLs saem na forma canônica e cada curso entra uma vez só: a mesma URL
+    (com outros parâmetros de rastreamento, barra final etc.) ou um título quase
+    igual com o mesmo slug no mesmo site, vindo de outro termo, é descartado.
+    """
+
+    def __init__(self, termos: Iterable[str], limite: int = RANKING_TOP_K, penalidade_posicao: float = RANKING_PENALIDADE_POSICAO):
+        self.termos = [_Termo(termo) for termo in termos]
+        self.limite = limite
+        self.penalidade_posicao = penalidade_posicao
+        # Min-heap de (pontuação, -ordem de chegada, curso): a raiz é o primeiro a sair.
+        self._heap: List[Tuple[float, int, Tuple[str, str]]] = []
+        self._urls: Set[str] = set()
+        # Assinatura do título dos cursos no heap, por host, para achar quase-duplicados.
+        self._assinaturas: Dict[str, Dict[str, Optional[bytes]]] = {}
+        self._ordem = itertools.count()
+
+    def adicionar(self, site: str, cursos: List[Tuple[str, str]]) -> bool:
+        """Considera os cursos de um site; True se algum entrou no top-k."""
+        mudou = False
+        for posicao, (titulo, url) in enumerate(cursos[:self.limite]):
+            url = url_canonica(url)
+            if url in self._urls:
+                continue
+            entrada = (pontuar(titulo, url, self.termos) - self.penalidade_posicao * posicao, -next(self._ordem), (titulo, url))
+            cheio = len(self._heap) >= self.limite
+            if cheio and entrada <= self._heap[0]:
+                continue
+            # A assinatura só é calculada para quem entraria no top-k.
+            assinatura = assinatura_titulo(titulo)
+            do_host = self._assinaturas.setdefault(host_da_url(url), {})
+            if algum_mesmo_curso(url, assinatura, do_host.items()):
+                continue
+            if cheio:
+                self._esquecer(heapq.heapreplace(self._heap, entrada)[2][1])
+            else:
+                heapq.heappush(self._heap, entrada)
+            self._urls.add(url)
+            do_host[url] = assinatura
+            mudou = True
+        return mudou
+
+    def _esquecer(self, url: str):
+        self._urls.discard(url)
+        self._assinaturas[host_da_url(url)].pop(url, None)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def resultados(self) -> List[Tuple[str, str]]:
+        """Cursos do top-k, do mais para o menos relevante."""
+        return [curso for _, _, curso in sorted(self._heap, reverse=True)]
@@ -0,0 +1,1068 @@
+"""Serviço de busca de cursos compartilhado pelos bots do Discord e do Telegram.
+
+Concentra as tabelas de sites, o scraping, o cache, o índice local e os limites de
+conexão em um único processo. Os bots falam com ele por HTTP local (ou socket Unix)
+através de `cliente_busca`; também pode ser importado e usado no mesmo processo.
+
+Uso: python servico_busca.py
+"""
+import os
+import json
+import asyncio
+import random
+import time
+import concurrent.futures
+import multiprocessing
+import contextlib
+import contextvars
+import email.utils
+import aiohttp
+from aiohttp import web
+import urllib.parse
+from collections import OrderedDict, deque
+from concurrent.futures.process import BrokenProcessPool
+from cache_http import CacheHTTP, RespostaCacheada, hash_conteudo
+from catalogo import CourseType, MAPA_CATEGORIAS, SITES_DE_BUSCA, SITES_PENTEST
+from extratores import extrair_medido, extrator_para
+from indice_cursos import IndiceCursos, normalizar_termo
+from metricas import BUCKETS_QUANTIDADE, Contador, Histograma, monitorar_loop, rota_metricas
+from ranking import RankingCursos
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Set, TypeVar
+
+# --- CONFIGURAÇÕES ---
+T = TypeVar("T")
+SERVICO_HOST = os.getenv("ITBOOST_SERVICO_HOST", "127.0.0.1")
+SERVICO_PORTA = int(os.getenv("ITBOOST_SERVICO_PORTA", "8750"))
+SERVICO_SOCKET = os.getenv("ITBOOST_SERVICO_SOCKET", "")
+CACHE_TTL = int(os.getenv("ITBOOST_CACHE_TTL", "600"))
+CACHE_JANELA_STALE = int(os.getenv("ITBOOST_CACHE_STALE", "1800"))
+CACHE_MAX_ENTRADAS = int(os.getenv("ITBOOST_CACHE_MAX_ENTRADAS", "2048"))
+HTTP_LIMITE_TOTAL = int(os.getenv("ITBOOST_HTTP_LIMITE_TOTAL", "100"))
+HTTP_LIMITE_POR_HOST = int(os.getenv("ITBOOST_HTTP_LIMITE_POR_HOST", "8"))
+HTTP_TTL_DNS = int(os.getenv("ITBOOST_HTTP_TTL_DNS", "300"))
+HTTP_KEEPALIVE = float(os.getenv("ITBOOST_HTTP_KEEPALIVE", "30"))
+HTTP_TIMEOUT = float(os.getenv("ITBOOST_HTTP_TIMEOUT", "15"))
+HTTP_TIMEOUT_MINIMO = float(os.getenv("ITBOOST_HTTP_TIMEOUT_MINIMO", "3"))
+HTTP_MAX_TENTATIVAS = int(os.getenv("ITBOOST_HTTP_MAX_TENTATIVAS", "3"))
+HTTP_HEDGE = os.getenv("ITBOOST_HTTP_HEDGE", "1") == "1"
+HTTP_MAX_EM_VOO = int(os.getenv("ITBOOST_HTTP_MAX_EM_VOO", "32"))
+HTTP_TAXA_POR_DOMINIO = float(os.getenv("ITBOOST_HTTP_TAXA_POR_DOMINIO", "2"))  # requisições/s sustentadas
+HTTP_RAJADA_POR_DOMINIO = float(os.getenv("ITBOOST_HTTP_RAJADA_POR_DOMINIO", "4"))
+HTTP_RESERVA_INTERATIVA = float(os.getenv("ITBOOST_HTTP_RESERVA_INTERATIVA", "0.25"))  # fração das vagas só para buscas de usuários
+HTTP_RETRY_AFTER_MAXIMO = float(os.getenv("ITBOOST_HTTP_RETRY_AFTER_MAXIMO", "30"))
+HTTP_CACHE_DB = os.getenv("ITBOOST_HTTP_CACHE_DB", "cache_http.db")
+HTTP_CACHE_MAX_MB = float(os.getenv("ITBOOST_HTTP_CACHE_MAX_MB", "64"))
+CIRCUITO_LIMIAR_FALHAS = int(os.getenv("ITBOOST_CIRCUITO_LIMIAR_FALHAS", "3"))
+CIRCUITO_RESFRIAMENTO = float(os.getenv("ITBOOST_CIRCUITO_RESFRIAMENTO", "60"))
+CIRCUITO_RESFRIAMENTO_MAXIMO = float(os.getenv("ITBOOST_CIRCUITO_RESFRIAMENTO_MAXIMO", "900"))
+PARSE_POOL = os.getenv("ITBOOST_PARSE_POOL", "thread")  # "thread" ou "process"
+PARSE_WORKERS = int(os.getenv("ITBOOST_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSE_MAX_PENDENTES = int(os.getenv("ITBOOST_PARSE_MAX_PENDENTES", str(PARSE_WORKERS * 4)))
+INDICE_DB_FILE = os.getenv("ITBOOST_INDICE_DB", "indice_cursos.db")
+INDICE_INTERVALO_MIN = float(os.getenv("ITBOOST_INDICE_INTERVALO_MIN", "30"))
+INDICE_IDADE_REFRESH = float(os.getenv("ITBOOST_INDICE_IDADE_REFRESH", "21600"))
+INDICE_IDADE_MAXIMA = float(os.getenv("ITBOOST_INDICE_IDADE_MAXIMA", "86400"))
+INDICE_MIN_RESULTADOS_FTS = int(os.getenv("ITBOOST_INDICE_MIN_RESULTADOS_FTS", "10"))
+TERMOS_POPULARES = [t.strip() for t in os.getenv("ITBOOST_TERMOS_POPULARES", "").split(",") if t.strip()]
+
+# --- MÉTRICAS ---
+FETCH_SEGUNDOS = Histograma(
+    "itboost_fetch_segundos", "Duração de cada tentativa de requisição a um site, pelo status HTTP ou por 'timeout'/'erro'.", ("site", "status")
+)
+FETCH_RESPOSTAS = Contador("itboost_fetch_respostas_total", "Respostas HTTP recebidas, por status.", ("site", "status"))
+# O aiohttp descomprime o corpo antes de contá-lo: são os bytes do HTML, não os que passaram pela rede.
+FETCH_BYTES_DECODIFICADOS = Contador(
+    "itboost_fetch_bytes_decodificados_total", "Bytes de HTML recebidos dos sites, já descomprimidos (gzip/deflate/br).", ("site",)
+)
+FETCH_FALHAS = Contador("itboost_fetch_falhas_total", "Páginas que não puderam ser obtidas após todas as tentativas.", ("site", "erro"))
+FETCH_IGNORADAS = Contador("itboost_fetch_ignoradas_total", "Requisições não feitas porque o circuito do site estava aberto.", ("site",))
+PARSE_SEGUNDOS = Histograma("itboost_parse_segundos", "Tempo de _parse_courses por página.", ("site",))
+PARSE_LINKS = Histograma("itboost_parse_links", "Cursos extraídos por página.", ("site",), buckets=BUCKETS_QUANTIDADE)
+AGENDADOR_ESPERA = Histograma("itboost_agendador_espera_segundos", "Espera por vaga e token antes de cada requisição.", ("prioridade",))
+AGENDADOR_RETRY_AFTER = Contador("itboost_agendador_retry_after_total", "Respostas com Retry-After respeitadas, por site.", ("site",))
+PARSE_MEMORIZADAS = Contador("itboost_parse_memorizadas_total", "Páginas cuja extração veio do cache por hash de conteúdo.", ("site",))
+
+# --- SESSÃO HTTP COMPARTILHADA ---
+HEADERS_HTTP = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+}
+_sessao_http: Optional[aiohttp.ClientSession] = None
+
+def obter_sessao_http() -> aiohttp.ClientSession:
+    """Retorna a sessão HTTP única da aplicação, criando-a na primeira chamada.
+
+    O conector limita conexões abertas (no total e por host), mantém conexões
+    vivas entre buscas e guarda as resoluções de DNS.
+    """
+    global _sessao_http
+    if _sessao_http is None or _sessao_http.closed:
+        conector = aiohttp.TCPConnector(
+            limit=HTTP_LIMITE_TOTAL,
+            limit_per_host=HTTP_LIMITE_POR_HOST,
+            use_dns_cache=True,
+            ttl_dns_cache=HTTP_TTL_DNS,
+            keepalive_timeout=HTTP_KEEPALIVE,
+        )
+        _sessao_http = aiohttp.ClientSession(
+            connector=conector,
+            headers=HEADERS_HTTP,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+            auto_decompress=True,
+        )
+    return _sessao_http
+
+async def fechar_sessao_http():
+    global _sessao_http
+    if _sessao_http is not None and not _sessao_http.closed:
+        await _sessao_http.close()
+    _sessao_http = None
+
+# --- SAÚDE DOS SITES (timeouts adaptativos e circuit breaker) ---
+class SaudeSite:
+    """Latências observadas e estado do circuit breaker de um host.
+
+    O timeout de cada requisição acompanha o p95 das últimas respostas do host.
+    Depois de CIRCUITO_LIMIAR_FALHAS falhas seguidas o circuito abre e o host é
+    ignorado durante o resfriamento; ao fim dele, uma única requisição de teste
+    decide se o circuito fecha ou reabre com resfriamento dobrado.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.latencias: deque = deque(maxlen=50)
+        self.falhas_consecutivas = 0
+        self.resfriamento = CIRCUITO_RESFRIAMENTO
+        self.aberto_ate = 0.0
+        self.em_teste = False
+        self.sucessos = 0
+        self.falhas = 0
+        self.ignoradas = 0
+        self.hedges = 0
+        self.ultimo_erro = ""
+
+    def _percentil(self, fracao: float) -> Optional[float]:
+        if len(self.latencias) < 5:
+            return None
+        ordenadas = sorted(self.latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(fracao * len(ordenadas)))]
+
+    def timeout_adaptativo(self) -> float:
+        p95 = self._percentil(0.95)
+        if p95 is None:
+            return HTTP_TIMEOUT
+        return min(HTTP_TIMEOUT, max(HTTP_TIMEOUT_MINIMO, p95 * 2 + 0.5))
+
+    def atraso_hedge(self) -> Optional[float]:
+        """A partir de quando vale disparar uma segunda requisição igual (p95 observado)."""
+        p95 = self._percentil(0.95)
+        if not HTTP_HEDGE or p95 is None or p95 >= self.timeout_adaptativo():
+            return None
+        return p95
+
+    @property
+    def aberto(self) -> bool:
+        return self.aberto_ate > 0
+
+    def permitir(self) -> bool:
+        if not self.aberto:
+            return True
+        if time.monotonic() >= self.aberto_ate and not self.em_teste:
+            self.em_teste = True
+            return True
+        self.ignoradas += 1
+        return False
+
+    def registrar_sucesso(self, latencia: float):
+        self.latencias.append(latencia)
+        self.sucessos += 1
+        self.falhas_consecutivas = 0
+        if self.aberto:
+            print(f"Circuito de {self.host} fechado: site voltou a responder.")
+        self.aberto_ate = 0.0
+        self.em_teste = False
+        self.resfriamento = CIRCUITO_RESFRIAMENTO
+
+    def registrar_falha(self, erro: BaseException):
+        self.falhas += 1
+        self.falhas_consecutivas += 1
+        self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+        if self.em_teste:
+            self.resfriamento = min(self.resfriamento * 2, CIRCUITO_RESFRIAMENTO_MAXIMO)
+            self.em_teste = False
+        elif self.aberto or self.falhas_consecutivas < CIRCUITO_LIMIAR_FALHAS:
+            return
+        self.aberto_ate = time.monotonic() + self.resfriamento
+        print(f"Circuito de {self.host} aberto por {self.resfriamento:.0f}s após {self.falhas_consecutivas} falhas ({self.ultimo_erro}).")
+
+    def estatisticas(self) -> Dict[str, object]:
+        return {
+            "aberto": self.aberto,
+            "timeout_s": round(self.timeout_adaptativo(), 2),
+            "p50_s": self._percentil(0.5),
+            "p95_s": self._percentil(0.95),
+            "sucessos": self.sucessos,
+            "falhas": self.falhas,
+            "ignoradas": self.ignoradas,
+            "hedges": self.hedges,
+            "ultimo_erro": self.ultimo_erro,
+        }
+
+class MonitorSites:
+    def __init__(self):
+        self._sites: Dict[str, SaudeSite] = {}
+
+    def do_url(self, url: str) -> SaudeSite:
+        host = urllib.parse.urlparse(url).netloc
+        saude = self._sites.get(host)
+        if saude is None:
+            saude = self._sites[host] = SaudeSite(host)
+        return saude
+
+    def estatisticas(self) -> Dict[str, Dict[str, object]]:
+        return {host: saude.estatisticas() for host, saude in self._sites.items()}
+
+monitor_sites = MonitorSites()
+
+class ErroTransitorio(Exception):
+    """Resposta que costuma se resolver sozinha (HTTP 429 ou 5xx) e merece nova tentativa."""
+
+    def __init__(self, mensagem: str, retry_after: Optional[float] = None):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+ERROS_TRANSITORIOS = (ErroTransitorio, asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+
+# --- AGENDADOR DE REQUISIÇÕES (token bucket por domínio + limite global) ---
+INTERATIVA, SEGUNDO_PLANO = 0, 1
+NOMES_PRIORIDADE = ("interativa", "segundo_plano")
+# Buscas de usuários são interativas; revalidações do cache e o crawler marcam o próprio contexto como segundo plano.
+prioridade_requisicao: contextvars.ContextVar[int] = contextvars.ContextVar("prioridade_requisicao", default=INTERATIVA)
+
+class BaldeTokens:
+    """Token bucket de um domínio, com filas de espera separadas por prioridade."""
+
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.tokens = capacidade
+        self.atualizado_em = time.monotonic()
+        self.bloqueado_ate = 0.0
+        self.filas: tuple[deque, deque] = (deque(), deque())
+
+    def disponivel_em(self, agora: float) -> float:
+        """Instante em que o próximo token estará livre (agora, se já houver um)."""
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado_em) * self.taxa)
+        self.atualizado_em = agora
+        falta = max(0.0, 1 - self.tokens) / self.taxa
+        return max(agora + falta, self.bloqueado_ate)
+
+class AgendadorRequisicoes:
+    """Decide quando cada requisição pode sair, para não sobrecarregar os sites.
+
+    Cada domínio tem um token bucket (`taxa` req/s, rajadas de até `rajada`) e no
+    máximo `max_em_voo` requisições ficam abertas ao mesmo tempo no total. Quem
+    espera é atendido por prioridade: buscas interativas antes das de segundo
+    plano, que além disso nunca ocupam a fração `reserva_interativa` das vagas.
+    Um Retry-After bloqueia o domínio até o prazo pedido pelo site.
+    """
+
+    def __init__(self, max_em_voo: int, taxa: float, rajada: float, reserva_interativa: float):
+        self.max_em_voo = max_em_voo
+        self.taxa = taxa
+        self.rajada = rajada
+        self.limite_segundo_plano = max(1, int(max_em_voo * (1 - reserva_interativa)))
+        self._baldes: Dict[str, BaldeTokens] = {}
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+        self.em_voo = 0
+        self.concedidas = [0, 0]
+        self.retry_after = 0
+
+    def _balde(self, dominio: str) -> BaldeTokens:
+        balde = self._baldes.get(dominio)
+        if balde is None:
+            balde = self._baldes[dominio] = BaldeTokens(self.taxa, self.rajada)
+        return balde
+
+    def bloqueado_por(self, dominio: str) -> float:
+        """Segundos que ainda faltam para o domínio sair de um Retry-After."""
+        balde = self._baldes.get(dominio)
+        return max(0.0, balde.bloqueado_ate - time.monotonic()) if balde else 0.0
+
+    def penalizar(self, dominio: str, segundos: float):
+        balde = self._balde(dominio)
+        balde.bloqueado_ate = max(balde.bloqueado_ate, time.monotonic() + segundos)
+        balde.tokens = 0.0
+        self.retry_after += 1
+        AGENDADOR_RETRY_AFTER.inc(dominio)
+
+    @contextlib.asynccontextmanager
+    async def vaga(self, dominio: str, prioridade: int):
+        inicio = time.perf_counter()
+        futuro = asyncio.get_running_loop().create_future()
+        fila = self._balde(dominio).filas[prioridade]
+        fila.append(futuro)
+        self._despachar()
+        try:
+            await futuro
+        except asyncio.CancelledError:
+            if futuro.cancelled():
+                with contextlib.suppress(ValueError):
+                    fila.remove(futuro)
+            else:
+                self.liberar()  # a vaga foi concedida no mesmo instante do cancelamento
+            raise
+        AGENDADOR_ESPERA.observar(time.perf_counter() - inicio, NOMES_PRIORIDADE[prioridade])
+        try:
+            yield
+        finally:
+            self.liberar()
+
+    def tentar_vaga(self, dominio: str, prioridade: int) -> bool:
+        """Concede uma vaga agora, sem esperar; False se faltar vaga global, token do domínio, ou se já houver fila nele.
+
+        Quem recebe True devolve a vaga com `liberar`.
+        """
+        limite = self.max_em_voo if prioridade == INTERATIVA else self.limite_segundo_plano
+        balde = self._balde(dominio)
+        agora = time.monotonic()
+        if self.em_voo >= limite or any(not futuro.done() for fila in balde.filas for futuro in fila):
+            return False
+        if balde.disponivel_em(agora) > agora:
+            return False
+        balde.tokens -= 1
+        self.em_voo += 1
+        self.concedidas[prioridade] += 1
+        return True
+
+    def liberar(self):
+        self.em_voo -= 1
+        self._despachar()
+
+    def _despachar(self):
+        agora = time.monotonic()
+        proximo = float("inf")
+        while True:
+            escolhido = None
+            for prioridade in (INTERATIVA, SEGUNDO_PLANO):
+                limite = self.max_em_voo if prioridade == INTERATIVA else self.limite_segundo_plano
+                if self.em_voo >= limite:
+                    continue
+                for balde in self._baldes.values():
+                    fila = balde.filas[prioridade]
+                    while fila and fila[0].done():
+                        fila.popleft()  # quem desistiu de esperar
+                    if not fila:
+                        continue
+                    quando = balde.disponivel_em(agora)
+                    if quando <= agora:
+                        escolhido = balde, fila, prioridade
+                        break
+                    proximo = min(proximo, quando)
+                if escolhido:
+                    break
+            if escolhido is None:
+                break
+            balde, fila, prioridade = escolhido
+            balde.tokens -= 1
+            self.em_voo += 1
+            self.concedidas[prioridade] += 1
+            fila.popleft().set_result(None)
+        if proximo < float("inf"):
+            loop = asyncio.get_running_loop()
+            if self._temporizador is None or self._temporizador.when() > loop.time() + (proximo - agora):
+                if self._temporizador is not None:
+                    self._temporizador.cancel()
+                self._temporizador = loop.call_later(proximo - agora, self._ao_vencer_temporizador)
+
+    def _ao_vencer_temporizador(self):
+        self._temporizador = None
+        self._despachar()
+
+    def estatisticas(self) -> Dict[str, object]:
+        agora = time.monotonic()
+        return {
+            "em_voo": self.em_voo,
+            "max_em_voo": self.max_em_voo,
+            "concedidas": dict(zip(NOMES_PRIORIDADE, self.concedidas)),
+            "retry_after": self.retry_after,
+            "aguardando": {
+                dominio: [len(fila) for fila in balde.filas]
+                for dominio, balde in self._baldes.items() if any(balde.filas)
+            },
+            "bloqueados": {
+                dominio: round(balde.bloqueado_ate - agora, 1)
+                for dominio, balde in self._baldes.items() if balde.bloqueado_ate > agora
+            },
+        }
+
+agendador_requisicoes = AgendadorRequisicoes(HTTP_MAX_EM_VOO, HTTP_TAXA_POR_DOMINIO, HTTP_RAJADA_POR_DOMINIO, HTTP_RESERVA_INTERATIVA)
+
+def _segundos_retry_after(valor: Optional[str]) -> Optional[float]:
+    """Retry-After em segundos, aceitando tanto o número quanto a data HTTP."""
+    if not valor:
+        return None
+    if valor.strip().isdigit():
+        return float(valor)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+# --- CACHE HTTP EM DISCO (requisições condicionais e extrações memorizadas) ---
+cache_paginas = CacheHTTP(HTTP_CACHE_DB, int(HTTP_CACHE_MAX_MB * 1024 * 1024))
+
+def _extracao_memorizada(html: str, base_url: str, filter_keyword: str) -> tuple[str, Optional[List[tuple[str, str]]]]:
+    hash_pagina = hash_conteudo(html)
+    return hash_pagina, cache_paginas.obter_extracao(hash_pagina, base_url, _chave_extracao(base_url, filter_keyword))
+
+def _chave_extracao(base_url: str, filter_keyword: str) -> str:
+    # A assinatura do extrator separa as extrações memorizadas por versões anteriores da especificação.
+    return f"{filter_keyword}#{extrator_para(base_url, filter_keyword).assinatura}"
+
+# --- WEB SCRAPING OTIMIZADO (Async) ---
+async def _requisitar(session: aiohttp.ClientSession, url: str, timeout: float, em_cache: Optional[RespostaCacheada] = None) -> str:
+    """GET da página; com uma cópia em cache, a requisição é condicional e um 304 devolve a cópia."""
+    cabecalhos = {}
+    if em_cache is not None:
+        if em_cache.etag:
+            cabecalhos["If-None-Match"] = em_cache.etag
+        if em_cache.last_modified:
+            cabecalhos["If-Modified-Since"] = em_cache.last_modified
+    site = urllib.parse.urlparse(url).netloc
+    inicio = time.perf_counter()
+    # Toda tentativa entra no histograma, inclusive as que falham: são elas que deixam um site lento.
+    status = "erro"
+    try:
+        async with session.get(url, headers=cabecalhos, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            status = str(response.status)
+            FETCH_RESPOSTAS.inc(site, status)
+            cache_control = response.headers.get("Cache-Control", "")
+            if response.status == 304 and em_cache is not None:
+                _manter_em_segundo_plano(asyncio.ensure_future(
+                    asyncio.to_thread(cache_paginas.renovar, url, cache_control, len(em_cache.corpo))
+                ))
+                return em_cache.corpo
+            if response.status == 429 or response.status >= 500:
+                raise ErroTransitorio(f"HTTP {response.status}", _segundos_retry_after(response.headers.get("Retry-After")))
+            response.raise_for_status()
+            html = await response.text()
+            FETCH_BYTES_DECODIFICADOS.inc(site, quantidade=response.content.total_bytes)
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    except asyncio.TimeoutError:
+        status = "timeout"
+        raise
+    except asyncio.CancelledError:
+        status = "cancelada"  # a outra cópia de um hedge chegou antes
+        raise
+    except aiohttp.ClientResponseError:
+        raise  # 4xx: o status HTTP já descreve a tentativa
+    except aiohttp.ClientError:
+        status = "erro"  # conexão caiu ou corpo incompleto, mesmo depois de o status chegar
+        raise
+    finally:
+        FETCH_SEGUNDOS.observar(time.perf_counter() - inicio, site, status)
+    # Compressão e escrita em disco ficam fora do caminho da resposta.
+    _manter_em_segundo_plano(asyncio.ensure_future(
+        asyncio.to_thread(cache_paginas.guardar, url, html, etag, last_modified, cache_control)
+    ))
+    return html
+
+async def _requisitar_com_hedge(session: aiohttp.ClientSession, url: str, saude: SaudeSite, em_cache: Optional[RespostaCacheada] = None) -> str:
+    """Se a resposta demorar mais que o p95 do site, dispara uma cópia e usa a que chegar primeiro."""
+    timeout = saude.timeout_adaptativo()
+    atraso = saude.atraso_hedge()
+    if atraso is None:
+        return await _requisitar(session, url, timeout, em_cache)
+    tarefas = {asyncio.ensure_future(_requisitar(session, url, timeout, em_cache))}
+    try:
+        prontas, _ = await asyncio.wait(tarefas, timeout=atraso)
+        # A cópia é mais uma requisição ao site: só sai com vaga e token próprios, senão a original segue sozinha.
+        if not prontas and agendador_requisicoes.tentar_vaga(saude.host, prioridade_requisicao.get()):
+            saude.hedges += 1
+            copia = asyncio.ensure_future(_requisitar(session, url, timeout, em_cache))
+            copia.add_done_callback(lambda _: agendador_requisicoes.liberar())
+            tarefas.add(copia)
+        pendentes = set(tarefas)
+        while True:
+            prontas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa in prontas:
+                if tarefa.exception() is None:
+                    return tarefa.result()
+            if not pendentes:
+                raise prontas.pop().exception()
+    finally:
+        for tarefa in tarefas:
+            if not tarefa.done():
+                tarefa.cancel()
+
+async def _fetch_page(session: aiohttp.ClientSession, url: str) -> str:
+    em_cache = await asyncio.to_thread(cache_paginas.obter, url)
+    if em_cache is not None and em_cache.fresco:
+        return em_cache.corpo
+    # Se o site falhar, a última cópia guardada (mesmo vencida) é melhor que nada.
+    reserva = em_cache.corpo if em_cache is not None else ""
+    saude = monitor_sites.do_url(url)
+    # Um site que pediu para esperar mais do que vale a pena é tratado como circuito aberto.
+    if agendador_requisicoes.bloqueado_por(saude.host) > HTTP_RETRY_AFTER_MAXIMO or not saude.permitir():
+        FETCH_IGNORADAS.inc(saude.host)
+        return reserva
+    prioridade = prioridade_requisicao.get()
+    erro: BaseException = RuntimeError("nenhuma tentativa realizada")
+    for tentativa in range(HTTP_MAX_TENTATIVAS):
+        try:
+            async with agendador_requisicoes.vaga(saude.host, prioridade):
+                inicio = time.perf_counter()
+                html = await _requisitar_com_hedge(session, url, saude, em_cache)
+        except ErroTransitorio as e:
+            erro = e
+            if e.retry_after is not None:
+                # O agendador segura as próximas requisições ao domínio até o prazo pedido.
+                agendador_requisicoes.penalizar(saude.host, e.retry_after)
+                if e.retry_after > HTTP_RETRY_AFTER_MAXIMO:
+                    break
+            elif tentativa + 1 < HTTP_MAX_TENTATIVAS:
+                await asyncio.sleep(0.25 * 2 ** tentativa * random.uniform(0.5, 1.5))
+        except ERROS_TRANSITORIOS as e:
+            erro = e
+            if tentativa + 1 < HTTP_MAX_TENTATIVAS:
+                # Backoff exponencial com jitter para não sincronizar as novas tentativas.
+                await asyncio.sleep(0.25 * 2 ** tentativa * random.uniform(0.5, 1.5))
+        except Exception as e:
+            erro = e  # 4xx e afins: repetir não vai mudar a resposta
+            break
+        else:
+            saude.registrar_sucesso(time.perf_counter() - inicio)
+            return html
+    saude.registrar_falha(erro)
+    FETCH_FALHAS.inc(saude.host, type(erro).__name__)
+    print(f"Falha ao buscar {url}: {erro!r}")
+    return reserva
+
+def _parse_courses(html: str, base_url: str, filter_keyword: str) -> List[tuple[str, str]]:
+    return extrator_para(base_url, filter_keyword).extrair(html)
+
+# --- PARSING FORA DO EVENT LOOP ---
+class PoolParsing:
+    """Executa _parse_courses em um pool de threads ou processos.
+
+    No máximo `max_pendentes` páginas ficam aguardando ou em parsing ao mesmo
+    tempo; acima disso as buscas esperam vaga, em vez de acumular HTML em memória.
+    O tempo de parsing de cada site é medido dentro do worker. Se um worker de
+    processo morre (falta de memória, crash no parser), o pool quebrado é
+    descartado e recriado, e a página é tentada mais uma vez no pool novo.
+    """
+
+    def __init__(self, tipo: str, workers: int, max_pendentes: int):
+        if tipo not in ("thread", "process"):
+            raise ValueError(f"Tipo de pool de parsing inválido: {tipo!r}")
+        self.tipo = tipo
+        self.workers = workers
+        self.max_pendentes = max_pendentes
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._vagas: Optional[asyncio.Semaphore] = None
+        self.pendentes = 0
+        self.recriacoes = 0
+        self.tempos_por_site: Dict[str, Dict[str, float]] = {}
+
+    def _obter_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            if self.tipo == "process":
+                # forkserver com extratores pré-carregado: cada worker nasce com bs4 importado e os
+                # extratores compilados, sem herdar as conexões SQLite e as threads deste processo.
+                contexto = multiprocessing.get_context("forkserver")
+                contexto.set_forkserver_preload(["extratores"])
+                self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=contexto)
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+        return self._executor
+
+    async def parse(self, html: str, base_url: str, filter_keyword: str) -> List[tuple[str, str]]:
+        if self._vagas is None:
+            self._vagas = asyncio.Semaphore(self.max_pendentes)
+        site = urllib.parse.urlparse(base_url).netloc
+        async with self._vagas:
+            self.pendentes += 1
+            try:
+                loop = asyncio.get_running_loop()
+                for tentativa in range(2):
+                    executor = self._obter_executor()
+                    try:
+                        cursos, duracao = await loop.run_in_executor(executor, extrair_medido, html, base_url, filter_keyword)
+                        break
+                    except BrokenProcessPool:
+                        self._descartar_executor(executor)
+                else:
+                    # A mesma página derrubou o pool duas vezes: provavelmente é ela que mata o worker.
+                    print(f"Parsing de {site} derrubou o pool de processos duas vezes; página ignorada.")
+                    return []
+            finally:
+                self.pendentes -= 1
+        self._registrar_tempo(site, duracao)
+        PARSE_SEGUNDOS.observar(duracao, site)
+        PARSE_LINKS.observar(len(cursos), site)
+        return cursos
+
+    def _descartar_executor(self, executor: concurrent.futures.Executor):
+        # Várias páginas veem o mesmo pool quebrar; só a primeira o troca.
+        if self._executor is not executor:
+            return
+        self._executor = None
+        self.recriacoes += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+        print(f"Pool de parsing quebrado (worker morreu); recriando ({self.recriacoes}ª vez).")
+
+    def _registrar_tempo(self, site: str, duracao: float):
+        estatistica = self.tempos_por_site.setdefault(site, {"paginas": 0, "total_s": 0.0, "max_s": 0.0})
+        estatistica["paginas"] += 1
+        estatistica["total_s"] += duracao
+        estatistica["max_s"] = max(estatistica["max_s"], duracao)
+
+    def estatisticas(self) -> Dict[str, object]:
+        return {
+            "tipo": self.tipo,
+            "workers": self.workers,
+            "pendentes": self.pendentes,
+            "max_pendentes": self.max_pendentes,
+            "recriacoes": self.recriacoes,
+            "por_site": {
+                site: {**e, "media_s": e["total_s"] / e["paginas"]} for site, e in self.tempos_por_site.items()
+            },
+        }
+
+    async def aquecer(self):
+        """Sobe todos os workers de um pool de processos agora, e não na primeira busca."""
+        if self.tipo == "process":
+            loop = asyncio.get_running_loop()
+            executor = self._obter_executor()
+            try:
+                await asyncio.gather(*(loop.run_in_executor(executor, os.getpid) for _ in range(self.workers)))
+            except BrokenProcessPool:
+                self._descartar_executor(executor)
+
+    def encerrar(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+pool_parsing = PoolParsing(PARSE_POOL, PARSE_WORKERS, PARSE_MAX_PENDENTES)
+
+# --- COALESCÊNCIA DE REQUISIÇÕES (single-flight) ---
+class SingleFlight:
+    """Agrupa chamadas concorrentes com a mesma chave em uma única execução.
+
+    A primeira chamada dispara o trabalho; as demais aguardam a mesma tarefa e
+    recebem o mesmo resultado (ou a mesma exceção). Cancelar quem espera não
+    cancela o trabalho compartilhado.
+    """
+
+    def __init__(self):
+        self._em_voo: Dict[Hashable, asyncio.Task] = {}
+        self.execucoes = 0
+        self.compartilhadas = 0
+
+    async def executar(self, chave: Hashable, funcao: Callable[[], Awaitable[T]]) -> T:
+        tarefa = self._em_voo.get(chave)
+        if tarefa is None:
+            self.execucoes += 1
+            tarefa = asyncio.ensure_future(funcao())
+            self._em_voo[chave] = tarefa
+            tarefa.add_done_callback(lambda t: self._finalizar(chave, t))
+        else:
+            self.compartilhadas += 1
+        return await asyncio.shield(tarefa)
+
+    def em_andamento(self, chave: Hashable) -> bool:
+        return chave in self._em_voo
+
+    def _finalizar(self, chave: Hashable, tarefa: asyncio.Task):
+        if self._em_voo.get(chave) is tarefa:
+            del self._em_voo[chave]
+        if not tarefa.cancelled():
+            tarefa.exception()  # marca a exceção como recuperada mesmo se todos desistiram de esperar
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {"em_voo": len(self._em_voo), "execucoes": self.execucoes, "compartilhadas": self.compartilhadas}
+
+voos_scraping = SingleFlight()
+
+async def _buscar_e_extrair(session: aiohttp.ClientSession, url: str, base_url: str, filter_keyword: str) -> List[tuple[str, str]]:
+    html = await _fetch_page(session, url)
+    if not html:
+        return []
+    hash_pagina, cursos = await asyncio.to_thread(_extracao_memorizada, html, base_url, filter_keyword)
+    if cursos is None:
+        cursos = await pool_parsing.parse(html, base_url, filter_keyword)
+        _manter_em_segundo_plano(asyncio.ensure_future(
+            asyncio.to_thread(cache_paginas.guardar_extracao, hash_pagina, base_url, _chave_extracao(base_url, filter_keyword), cursos)
+        ))
+    else:
+        PARSE_MEMORIZADAS.inc(urllib.parse.urlparse(base_url).netloc)
+    return cursos
+
+async def _scrape_site(session: aiohttp.ClientSession, url_template: str, base_url: str, filter_keyword: str) -> List[tuple[str, str]]:
+    # Os voos são separados por prioridade: uma busca interativa não entra num voo de segundo plano,
+    # que espera na fila de baixa prioridade do agendador. O segundo plano aproveita um voo interativo.
+    chave = (url_template, base_url, filter_keyword)
+    prioridade = prioridade_requisicao.get()
+    if prioridade == SEGUNDO_PLANO and voos_scraping.em_andamento((*chave, INTERATIVA)):
+        prioridade = INTERATIVA
+    return await voos_scraping.executar(
+        (*chave, prioridade),
+        lambda: _buscar_e_extrair(session, url_template, base_url, filter_keyword),
+    )
+
+# --- CACHE DE RESULTADOS (TTL + LRU + stale-while-revalidate) ---
+class CacheResultados:
+    """Cache em memória dos cursos de cada site por termo, com expiração e despejo LRU.
+
+    Entradas mais velhas que o TTL, mas ainda dentro da janela de stale, continuam
+    sendo servidas enquanto uma atualização roda em segundo plano.
+    """
+
+    def __init__(self, max_entradas: int, ttl: float, janela_stale: float):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.janela_stale = janela_stale
+        self._entradas: "OrderedDict[tuple[str, str], tuple[float, List[tuple[str, str]]]]" = OrderedDict()
+        self._revalidando: Set[tuple[str, str]] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expiracoes = 0
+
+    def obter(self, chave: tuple[str, str]) -> Optional[tuple[List[tuple[str, str]], bool]]:
+        """Retorna (cursos, obsoleto) ou None se a chave não estiver em cache."""
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            self.misses += 1
+            return None
+        criado_em, cursos = entrada
+        idade = time.monotonic() - criado_em
+        if idade > self.ttl + self.janela_stale:
+            del self._entradas[chave]
+            self.expiracoes += 1
+            self.misses += 1
+            return None
+        self._entradas.move_to_end(chave)
+        if idade > self.ttl:
+            self.stale_hits += 1
+            return cursos, True
+        self.hits += 1
+        return cursos, False
+
+    def guardar(self, chave: tuple[str, str], cursos: List[tuple[str, str]]):
+        self._entradas[chave] = (time.monotonic(), cursos)
+        self._entradas.move_to_end(chave)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+            self.evictions += 1
+
+    def iniciar_revalidacao(self, chave: tuple[str, str]) -> bool:
+        """Marca a chave como em atualização; False se já houver uma em andamento."""
+        if chave in self._revalidando:
+            return False
+        self._revalidando.add(chave)
+        return True
+
+    def finalizar_revalidacao(self, chave: tuple[str, str]):
+        self._revalidando.discard(chave)
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {
+            "entradas": len(self._entradas),
+            "max_entradas": self.max_entradas,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expiracoes": self.expiracoes,
+            "revalidando": len(self._revalidando),
+        }
+
+cache_resultados = CacheResultados(CACHE_MAX_ENTRADAS, CACHE_TTL, CACHE_JANELA_STALE)
+_tarefas_segundo_plano: Set[asyncio.Task] = set()
+
+def _manter_em_segundo_plano(tarefa: asyncio.Future):
+    """Guarda uma referência à tarefa até ela terminar, para que não seja coletada no meio."""
+    _tarefas_segundo_plano.add(tarefa)
+    tarefa.add_done_callback(_tarefas_segundo_plano.discard)
+
+async def _revalidar_site(chave: tuple[str, str], url: str, base_url: str, filter_keyword: str):
+    prioridade_requisicao.set(SEGUNDO_PLANO)  # roda na própria tarefa: não afeta quem a criou
+    try:
+        cursos = await _scrape_site(obter_sessao_http(), url, base_url, filter_keyword)
+        if cursos:
+            cache_resultados.guardar(chave, cursos)
+    finally:
+        cache_resultados.finalizar_revalidacao(chave)
+
+async def _scrape_site_cacheado(session: aiohttp.ClientSession, nome_site: str, termo: str, url: str, base_url: str, filter_keyword: str) -> List[tuple[str, str]]:
+    chave = (nome_site, normalizar_termo(termo))
+    em_cache = cache_resultados.obter(chave)
+    if em_cache is not None:
+        cursos, obsoleto = em_cache
+        if obsoleto and cache_resultados.iniciar_revalidacao(chave):
+            _manter_em_segundo_plano(asyncio.create_task(_revalidar_site(chave, url, base_url, filter_keyword)))
+        return cursos
+    cursos = await _scrape_site(session, url, base_url, filter_keyword)
+    # Falhas de rede viram lista vazia; não as guardamos para não esconder o site por um TTL inteiro.
+    if cursos:
+        cache_resultados.guardar(chave, cursos)
+    return cursos
+
+SUFIXO_GRATIS = " (Grátis)"
+
+def _filtrar_sites(sites: Dict[str, dict], course_type: CourseType) -> Dict[str, dict]:
+    filtrados = {}
+    for name, data in sites.items():
+        if course_type != "all" and data['type'] != course_type and data['type'] != 'mixed':
+            continue
+        if course_type == "free" and "url_gratis" in data:
+            if data["url_gratis"] is None:
+                continue
+            # A listagem só de gratuitos é outro "site": cache e índice próprios, sem misturar com a completa.
+            filtrados[name + SUFIXO_GRATIS] = {**data, "url": data["url_gratis"]}
+        else:
+            filtrados[name] = data
+    return filtrados
+
+ORIGEM_INDICE_TEXTO = "Índice local"
+
+async def _buscar_em_sites_stream(sites_filtrados: Dict[str, dict], termo: str) -> AsyncIterator[tuple[str, List[tuple[str, str]]]]:
+    """Entrega (site, cursos) à medida que cada site responde.
+
+    O que estiver no índice local sai imediatamente; o restante vem do scraping
+    ao vivo, na ordem em que os sites terminam. Para um termo fora do índice, os
+    títulos indexados que casam com ele (busca textual) saem antes, como
+    resultado parcial, e todos os sites são raspados ao vivo em seguida. Se o
+    consumidor parar antes do fim, os downloads pendentes seguem em segundo
+    plano e aquecem o cache.
+    """
+    indexados = await asyncio.to_thread(indice_cursos.consultar, termo, sites_filtrados, INDICE_IDADE_MAXIMA)
+    if termo and not indexados:
+        via_texto = await asyncio.to_thread(indice_cursos.buscar_texto, termo, sites_filtrados, INDICE_MIN_RESULTADOS_FTS * 5)
+        if len(via_texto) >= INDICE_MIN_RESULTADOS_FTS:
+            yield ORIGEM_INDICE_TEXTO, via_texto
+    for name in sites_filtrados:
+        if name in indexados:
+            yield name, indexados[name]
+    termo_formatado = urllib.parse.quote_plus(termo)
+    session = obter_sessao_http()
+    pendentes = {
+        asyncio.ensure_future(_scrape_site_cacheado(session, name, termo, data['url'].format(termo_formatado), data['base'], data['filter'])): name
+        for name, data in sites_filtrados.items() if name not in indexados
+    }
+    try:
+        while pendentes:
+            prontas, _ = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa in prontas:
+                yield pendentes.pop(tarefa), tarefa.result()
+    finally:
+        for tarefa in pendentes:
+            _manter_em_segundo_plano(tarefa)
+
+async def _mesclar_streams(streams: List[AsyncIterator[tuple[str, List[tuple[str, str]]]]]) -> AsyncIterator[tuple[str, List[tuple[str, str]]]]:
+    """Intercala vários streams de busca, entregando cada item assim que ele chega.
+
+    Se um stream falhar, os outros continuam até o fim e a primeira falha é relançada
+    depois, como aconteceria numa busca de um termo só.
+    """
+    fila: asyncio.Queue = asyncio.Queue()
+    fim = object()
+    falhas: List[BaseException] = []
+
+    async def consumir(stream):
+        try:
+            async for item in stream:
+                await fila.put(item)
+        except Exception as e:
+            falhas.append(e)
+        finally:
+            fila.put_nowait(fim)
+
+    consumidores = [asyncio.create_task(consumir(stream)) for stream in streams]
+    restantes = len(consumidores)
+    try:
+        while restantes:
+            item = await fila.get()
+            if item is fim:
+                restantes -= 1
+                continue
+            yield item
+        if falhas:
+            raise falhas[0]
+    finally:
+        for consumidor in consumidores:
+            consumidor.cancel()
+
+def pesquisar_cursos_stream(termo: str, course_type: CourseType = "all") -> AsyncIterator[tuple[str, List[tuple[str, str]]]]:
+    return _buscar_em_sites_stream(_filtrar_sites(SITES_DE_BUSCA, course_type), termo)
+
+def pesquisar_cursos_pentest_stream(course_type: CourseType = "all") -> AsyncIterator[tuple[str, List[tuple[str, str]]]]:
+    return _buscar_em_sites_stream(_filtrar_sites(SITES_PENTEST, course_type), "")
+
+async def _coletar_ranqueados(termos: List[str], stream: AsyncIterator[tuple[str, List[tuple[str, str]]]]) -> List[tuple[str, str]]:
+    ranking = RankingCursos(termos)
+    async for site, cursos in stream:
+        ranking.adicionar(site, cursos)
+    return ranking.resultados()
+
+async def pesquisar_cursos_online(termo: str, course_type: CourseType = "all") -> List[tuple[str, str]]:
+    return await _coletar_ranqueados([termo], pesquisar_cursos_stream(termo, course_type))
+
+async def pesquisar_cursos_pentest(course_type: CourseType = "all") -> List[tuple[str, str]]:
+    return await _coletar_ranqueados([], pesquisar_cursos_pentest_stream(course_type))
+
+# --- CRAWLER DO CATÁLOGO (índice local) ---
+indice_cursos = IndiceCursos(INDICE_DB_FILE)
+
+def _sites_rastreados() -> tuple[Dict[str, dict], Dict[str, dict]]:
+    """Sites de busca e de pentest do crawler, incluindo as listagens só de gratuitos ("<site> (Grátis)")."""
+    return (
+        {**SITES_DE_BUSCA, **_filtrar_sites(SITES_DE_BUSCA, "free")},
+        {**SITES_PENTEST, **_filtrar_sites(SITES_PENTEST, "free")},
+    )
+
+def _pares_do_catalogo() -> List[tuple[str, str]]:
+    """Todas as combinações (site, termo) que o crawler mantém indexadas."""
+    termos = list(dict.fromkeys(
+        normalizar_termo(termo)
+        for termos_categoria, _ in MAPA_CATEGORIAS.values() for termo in termos_categoria + TERMOS_POPULARES
+    ))
+    sites_busca, sites_pentest = _sites_rastreados()
+    pares = [(site, termo) for termo in termos for site in sites_busca]
+    pares += [(site, "") for site in sites_pentest]
+    return pares
+
+async def _indexar_par(site: str, termo: str):
+    sites_busca, sites_pentest = _sites_rastreados()
+    data = sites_busca.get(site) or sites_pentest[site]
+    url = data['url'].format(urllib.parse.quote_plus(termo))
+    cursos = await _scrape_site(obter_sessao_http(), url, data['base'], data['filter'])
+    # Uma falha de rede não apaga o que já estava indexado; o par volta na próxima rodada.
+    if cursos:
+        await asyncio.to_thread(indice_cursos.substituir, site, termo, cursos)
+
+async def rastrear_catalogo():
+    """Uma rodada do crawler: atualiza os pares (site, termo) vencidos e relata o estado do índice."""
+    try:
+        pendentes = await asyncio.to_thread(indice_cursos.pendentes, _pares_do_catalogo(), INDICE_IDADE_REFRESH)
+        # Um termo por vez (todos os sites em paralelo) para não competir com as buscas dos usuários.
+        por_termo: Dict[str, List[str]] = {}
+        for site, termo in pendentes:
+            por_termo.setdefault(termo, []).append(site)
+        for termo, sites in por_termo.items():
+            await asyncio.gather(*(_indexar_par(site, termo) for site in sites))
+        estatisticas = await asyncio.to_thread(indice_cursos.estatisticas)
+        idade = estatisticas['idade_mais_antiga_s']
+        print(f"Índice: {len(pendentes)} consultas rastreadas nesta rodada, {estatisticas['cursos']} cursos em "
+              f"{estatisticas['consultas']} consultas, {estatisticas['tamanho_bytes'] // 1024} KiB, "
+              f"consulta mais antiga com {idade / 3600 if idade is not None else 0:.1f}h.")
+    except Exception as e:
+        print(f"Erro no crawler do catálogo: {e}")
+
+async def _laco_rastreamento():
+    prioridade_requisicao.set(SEGUNDO_PLANO)
+    while True:
+        await rastrear_catalogo()
+        await asyncio.sleep(INDICE_INTERVALO_MIN * 60)
+
+# --- API DE BUSCA ---
+def buscar_stream(termos: List[str], course_type: CourseType = "all", incluir_pentest: bool = False) -> AsyncIterator[tuple[str, List[tuple[str, str]]]]:
+    """Stream único com os resultados de vários termos (e, opcionalmente, dos sites de pentest)."""
+    streams = []
+    if incluir_pentest:
+        streams.append(pesquisar_cursos_pentest_stream(course_type))
+    streams += [pesquisar_cursos_stream(termo, course_type) for termo in termos]
+    return streams[0] if len(streams) == 1 else _mesclar_streams(streams)
+
+async def estatisticas() -> Dict[str, object]:
+    # As estruturas em memória são lidas no próprio loop, que é quem as altera; só as leituras
+    # dos bancos SQLite vão para threads.
+    em_memoria = {
+        "cache": cache_resultados.estatisticas(),
+        "single_flight": voos_scraping.estatisticas(),
+        "parsing": pool_parsing.estatisticas(),
+        "sites": monitor_sites.estatisticas(),
+        "agendador": agendador_requisicoes.estatisticas(),
+    }
+    indice, cache_http = await asyncio.gather(
+        asyncio.to_thread(indice_cursos.estatisticas), asyncio.to_thread(cache_paginas.estatisticas)
+    )
+    return {**em_memoria, "indice": indice, "cache_http": cache_http}
+
+_tarefa_crawler: Optional[asyncio.Task] = None
+
+async def iniciar_motor(com_crawler: bool = False):
+    global _tarefa_crawler
+    obter_sessao_http()
+    await pool_parsing.aquecer()
+    if com_crawler and _tarefa_crawler is None:
+        _tarefa_crawler = asyncio.create_task(_laco_rastreamento())
+
+async def encerrar_motor():
+    global _tarefa_crawler
+    if _tarefa_crawler is not None:
+        _tarefa_crawler.cancel()
+        _tarefa_crawler = None
+    await fechar_sessao_http()
+    pool_parsing.encerrar()
+
+# --- SERVIDOR HTTP LOCAL ---
+async def _rota_buscar(request: web.Request) -> web.StreamResponse:
+    """GET /buscar?termo=...&termo=...&tipo=free|paid|all&pentest=1
+
+    Responde em NDJSON, uma linha {"site": ..., "cursos": [[titulo, url], ...]} por
+    site, enviada assim que o site termina.
+    """
+    termos = [termo for termo in request.query.getall("termo", []) if termo.strip()]
+    tipo = request.query.get("tipo", "all")
+    incluir_pentest = request.query.get("pentest") == "1"
+    if tipo not in ("free", "paid", "all") or not (termos or incluir_pentest):
+        raise web.HTTPBadRequest(text="Parâmetros inválidos: informe 'termo' ou 'pentest=1' e um 'tipo' válido.")
+    resposta = web.StreamResponse(headers={"Content-Type": "application/x-ndjson; charset=utf-8"})
+    await resposta.prepare(request)
+    stream = buscar_stream(termos, tipo, incluir_pentest)
+    try:
+        async for site, cursos in stream:
+            await resposta.write((json.dumps({"site": site, "cursos": cursos}, ensure_ascii=False) + "\n").encode())
+    finally:
+        await stream.aclose()
+    await resposta.write_eof()
+    return resposta
+
+async def _rota_estatisticas(request: web.Request) -> web.Response:
+    return web.json_response(await estatisticas())
+
+async def _ao_iniciar(app: web.Application):
+    await iniciar_motor(com_crawler=True)
+    app["monitor_loop"] = asyncio.create_task(monitorar_loop())
+
+async def _ao_encerrar(app: web.Application):
+    app["monitor_loop"].cancel()
+    await encerrar_motor()
+    if _tarefas_segundo_plano:
+        # Gravações pendentes no cache em disco terminam antes de fechar os bancos.
+        await asyncio.wait(set(_tarefas_segundo_plano), timeout=5)
+    indice_cursos.fechar()
+    cache_paginas.fechar()
+
+def criar_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/buscar", _rota_buscar)
+    app.router.add_get("/estatisticas", _rota_estatisticas)
+    app.router.add_get("/metrics", rota_metricas)
+    app.on_startup.append(_ao_iniciar)
+    app.on_cleanup.append(_ao_encerrar)
+    return app
+
+
+if __name__ == "__main__":
+    if SERVICO_SOCKET:
+        print(f"Serviço de busca ouvindo em {SERVICO_SOCKET}")
+        web.run_app(criar_app(), path=SERVICO_SOCKET, print=None)
+    else:
+        print(f"Serviço de busca ouvindo em http://{SERVICO_HOST}:{SERVICO_PORTA}")
+        web.run_app(criar_app(), host=SERVICO_HOST, port=SERVICO_PORTA, print=None)
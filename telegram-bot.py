@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
 
 import os
-import sqlite3
-import requests
-from bs4 import BeautifulSoup
-import urllib.parse
 import logging
 from typing import List, Tuple
 
+from banco_de_dados import BancoDeDados
+from catalogo import MAPA_CATEGORIAS
+from cliente_busca import ClienteBusca
+from metricas import ServidorMetricas, medir_comando
+
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand
 # NOVO: Importa BotCommand para definir a lista de comandos
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
@@ -19,6 +20,11 @@ TOKEN = os.getenv("","")
 # --- ARQUIVOS DE DADOS ---
 DB_FILE = "cursos_usuarios.db"
 
+# --- MÉTRICAS (endpoint /metrics local; porta 0 desliga) ---
+METRICAS_HOST = os.getenv("TELEGRAM_METRICAS_HOST", "127.0.0.1")
+METRICAS_PORTA = int(os.getenv("TELEGRAM_METRICAS_PORTA", "9102"))
+servidor_metricas = ServidorMetricas(METRICAS_HOST, METRICAS_PORTA)
+
 # --- CONFIGURAÇÃO DE LOGS ---
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -28,79 +34,21 @@ logger = logging.getLogger(__name__)
 
 
 # --- BANCO DE DADOS ---
-def iniciar_banco_de_dados():
-    """Cria a tabela do banco de dados se ela não existir."""
-    conexao = sqlite3.connect(DB_FILE)
-    cursor = conexao.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS inscricoes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            course_title TEXT NOT NULL,
-            course_url TEXT NOT NULL,
-            UNIQUE(user_id, course_url)
-        )
-    ''')
-    conexao.commit()
-    conexao.close()
+# Mesmo arquivo e mesma camada de acesso usados pelo bot do Discord.
+banco = BancoDeDados(DB_FILE)
 
 
-# --- WEB SCRAPING E BUSCAS (Sem alterações) ---
-def pegar_cursos(url: str, base_url: str, filter_keyword: str) -> List[Tuple[str, str]]:
-    cursos = []
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        for a in soup.find_all("a", href=True):
-            if filter_keyword in a['href']:
-                link = a['href']
-                if not link.startswith("http"):
-                    link = base_url + link
-                title = a.get_text(strip=True) or (a.find('img') and a.find('img').get('alt'))
-                if not title or len(title) < 5:
-                    title = link.split('/')[-1].split('?')[0].replace('-', ' ').replace('_', ' ').title()
-                cursos.append((title.strip(), link))
-        return list(dict.fromkeys(cursos))
-    except requests.RequestException as e:
-        logger.error(f"Erro de rede ao acessar {url}: {e}")
-        return []
-    except Exception as e:
-        logger.error(f"Erro desconhecido ao processar {url}: {e}")
-        return []
-
-sites_de_busca = {
-    "Udemy (Grátis)": ("https://www.udemy.com/courses/search/?price=price-free&q={}&sort=relevance", "https://www.udemy.com", "/course/"),
-    "Coursera": ("https://www.coursera.org/search?query={}", "https://www.coursera.org", "/learn/"),
-    "edX": ("https://www.edx.org/search?q={}", "https://www.edx.org", "/course/"),
-    "Digital Innovation One": ("https://www.dio.me/browse?search={}", "https://www.dio.me", "/curso/"),
-    "Fund. Bradesco Escola Virtual": ("https://www.ev.org.br/catalogo-de-cursos?query={}", "https://www.ev.org.br", "/curso/"),
-    "Udacity (Grátis)": ("https://www.udacity.com/courses/all?price=Free&search={}", "https://www.udacity.com", "/course/"),
-    "FutureLearn": ("https://www.futurelearn.com/search?q={}", "https://www.futurelearn.com", "/courses/"),
-    "Alison (TI)": ("https://alison.com/courses?query={}&category=it", "https://alison.com", "/course/"),
-}
-
-def pesquisar_cursos_online(termo: str) -> List[Tuple[str, str]]:
-    todos_cursos = []
-    termo_formatado = urllib.parse.quote_plus(termo)
-    for nome, (url_template, base, filtro) in sites_de_busca.items():
-        url_de_busca = url_template.format(termo_formatado)
-        logger.info(f"Pesquisando '{termo}' em {nome}...")
-        todos_cursos.extend(pegar_cursos(url_de_busca, base, filtro))
-    return list(dict.fromkeys(todos_cursos))
-
-sites_pentest = {
-    "HackerSec (Grátis)": ("https://hackersec.com/cursos-gratuitos/", "https://hackersec.com", "/curso/"),
-    "Cybrary (Free Courses)": ("https://www.cybrary.it/catalog/free/", "https://www.cybrary.it", "/course/"),
-}
-
-def pesquisar_cursos_pentest_especializados() -> List[Tuple[str, str]]:
-    todos_cursos = []
-    for nome, (url_fixa, base, filtro) in sites_pentest.items():
-        logger.info(f"Pesquisando em site especializado: {nome}...")
-        todos_cursos.extend(pegar_cursos(url_fixa, base, filtro))
-    return list(dict.fromkeys(todos_cursos))
+# --- BUSCAS (serviço compartilhado) ---
+# O scraping roda em servico_busca.py, o mesmo motor usado pelo bot do Discord; este
+# bot consulta só as plataformas gratuitas do catálogo compartilhado.
+cliente_busca = ClienteBusca()
+
+async def pesquisar_cursos_online(termo: str) -> List[Tuple[str, str]]:
+    logger.info(f"Pesquisando '{termo}' no serviço de busca...")
+    return await cliente_busca.pesquisar([termo], course_type="free")
+
+async def pesquisar_varios_termos(termos: List[str], incluir_pentest: bool = False) -> List[Tuple[str, str]]:
+    return await cliente_busca.pesquisar(termos, course_type="free", incluir_pentest=incluir_pentest)
 
 
 # --- FUNÇÕES AUXILIARES DO TELEGRAM (Sem alterações) ---
@@ -118,10 +66,10 @@ async def enviar_resultados_cursos(update: Update, context: ContextTypes.DEFAULT
         text=f"🔎 *Resultados para '{get_sanitized_text(titulo_header)}'*",
         parse_mode=ParseMode.MARKDOWN_V2
     )
-    for titulo, url in cursos[:10]:
-        url_hash = str(hash(url))
-        context.user_data[url_hash] = {'title': titulo, 'url': url}
-        keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("✅ Salvar na minha lista", callback_data=f"save:{url_hash}")]])
+    # Os ids vêm do registro compartilhado no banco: valem após restarts e em qualquer processo do bot.
+    ids_cursos = await banco.registrar_cursos(cursos[:10])
+    for (titulo, url), id_curso in zip(cursos[:10], ids_cursos):
+        keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("✅ Salvar na minha lista", callback_data=f"save:{id_curso}")]])
         titulo_curto = (titulo[:75] + '...') if len(titulo) > 75 else titulo
         mensagem_curso = f"🎓 *{get_sanitized_text(titulo_curto)}*\n\n[Acessar Curso]({url})"
         await context.bot.send_message(
@@ -172,22 +120,19 @@ async def pesquisar_cursos(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Por favor, me diga o que você quer aprender.\nExemplo: `/pesquisar_cursos Python`")
         return
     await update.message.reply_text(f"Buscando cursos sobre '{termo_busca}', por favor aguarde...")
-    resultados = pesquisar_cursos_online(termo_busca)
+    resultados = await pesquisar_cursos_online(termo_busca)
     await enviar_resultados_cursos(update, context, resultados, termo_busca)
 
 async def cursos_pentest(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("Buscando cursos de Pentest e Hacking Ético, aguarde...")
-    todos_resultados = pesquisar_cursos_pentest_especializados() + pesquisar_cursos_online("pentest") + pesquisar_cursos_online("ethical hacking")
-    await enviar_resultados_cursos(update, context, list(dict.fromkeys(todos_resultados)), "Pentest & Hacking Ético")
+    # Os termos da categoria de segurança do catálogo, que o crawler mantém no índice local.
+    resultados = await pesquisar_varios_termos(MAPA_CATEGORIAS["seguranca"][0], incluir_pentest=True)
+    await enviar_resultados_cursos(update, context, resultados, "Pentest & Hacking Ético")
 
 async def meus_cursos(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     try:
-        conexao = sqlite3.connect(DB_FILE)
-        cursor = conexao.cursor()
-        cursor.execute("SELECT course_title, course_url FROM inscricoes WHERE user_id = ?", (user_id,))
-        cursos_do_usuario = cursor.fetchall()
-        conexao.close()
+        cursos_do_usuario = await banco.listar_inscricoes(user_id, limite=25)
     except Exception as e:
         logger.error(f"Erro ao buscar cursos do usuário no DB: {e}")
         await update.message.reply_text("Ocorreu um erro ao buscar sua lista de cursos.")
@@ -209,47 +154,40 @@ async def button_callback_handler(update: Update, context: ContextTypes.DEFAULT_
     await query.answer()
     data = query.data
     if data.startswith("save:"):
-        url_hash = data.split(":", 1)[1]
-        if url_hash not in context.user_data:
+        try:
+            curso_info = await banco.obter_curso_registrado(data.split(":", 1)[1])
+        except Exception as e:
+            logger.error(f"Erro de DB ao resolver o curso do botão {data!r}: {e}")
+            await context.bot.answer_callback_query(callback_query_id=query.id, text="Erro ao tentar salvar o curso.", show_alert=True)
+            return
+        if curso_info is None:
             await query.edit_message_text(text=query.message.text + "\n\n❌ Erro: Os dados deste curso expiraram. Por favor, faça a busca novamente.")
             return
-        curso_info = context.user_data[url_hash]
         user_id = query.from_user.id
-        course_title, course_url = curso_info['title'], curso_info['url']
+        course_title, course_url = curso_info
         try:
-            conexao = sqlite3.connect(DB_FILE)
-            cursor = conexao.cursor()
-            cursor.execute("INSERT INTO inscricoes (user_id, course_title, course_url) VALUES (?, ?, ?)", (user_id, course_title, course_url))
-            conexao.commit()
-            conexao.close()
-            await query.edit_message_text(text=query.message.text_markdown_v2 + "\n\n*Curso salvo na sua lista\\!*", parse_mode=ParseMode.MARKDOWN_V2, disable_web_page_preview=True)
-            await context.bot.answer_callback_query(callback_query_id=query.id, text="Curso salvo!", show_alert=False)
-        except sqlite3.IntegrityError:
-            await context.bot.answer_callback_query(callback_query_id=query.id, text="Você já salvou este curso!", show_alert=True)
+            inserido = await banco.salvar_inscricao(user_id, course_title, course_url)
         except Exception as e:
             logger.error(f"Erro de DB ao salvar curso: {e}")
             await context.bot.answer_callback_query(callback_query_id=query.id, text="Erro ao tentar salvar o curso.", show_alert=True)
+            return
+        if inserido:
+            await query.edit_message_text(text=query.message.text_markdown_v2 + "\n\n*Curso salvo na sua lista\\!*", parse_mode=ParseMode.MARKDOWN_V2, disable_web_page_preview=True)
+            await context.bot.answer_callback_query(callback_query_id=query.id, text="Curso salvo!", show_alert=False)
+        else:
+            await context.bot.answer_callback_query(callback_query_id=query.id, text="Você já salvou este curso!", show_alert=True)
     elif data.startswith("cat_"):
         categoria = data.split("_", 1)[1]
-        mapa_categorias = {
-            "programacao": (["programação", "python", "javascript", "java"], "💻 Cursos de Programação"),
-            "redes": (["redes de computadores", "ccna", "infraestrutura ti"], "🌐 Cursos de Redes e Infraestrutura"),
-            "cloud": (["aws", "azure", "google cloud"], "☁️ Cursos de Cloud Computing"),
-            "dados": (["sql", "banco de dados", "nosql"], "🗄️ Cursos de Banco de Dados"),
-            "ciencia_dados": (["ciencia de dados", "machine learning", "inteligencia artificial"], "📊 Cursos de Ciência de Dados"),
-            "devops": (["devops", "docker", "kubernetes", "ci/cd"], "⚙️ Cursos de DevOps"),
-        }
         if categoria == "seguranca":
             await query.edit_message_text(text="Buscando cursos de Segurança, por favor aguarde...")
             await cursos_pentest(update, context)
             return
-        if categoria in mapa_categorias:
-            termos_de_busca, titulo_header = mapa_categorias[categoria]
+        # Os mesmos termos do bot do Discord e do crawler: as categorias saem do índice local.
+        if categoria in MAPA_CATEGORIAS:
+            termos_de_busca, titulo_header = MAPA_CATEGORIAS[categoria]
             await query.edit_message_text(text=f"Buscando cursos de {titulo_header.split(' ', 1)[1]}, por favor aguarde...")
-            todos_resultados = []
-            for termo in termos_de_busca:
-                todos_resultados.extend(pesquisar_cursos_online(termo))
-            await enviar_resultados_cursos(update, context, list(dict.fromkeys(todos_resultados)), titulo_header)
+            todos_resultados = await pesquisar_varios_termos(termos_de_busca)
+            await enviar_resultados_cursos(update, context, todos_resultados, titulo_header)
 
 
 # NOVO: Função para configurar os comandos no menu do Telegram
@@ -263,9 +201,19 @@ async def post_init(application: Application):
         BotCommand("ajuda", "Mostra esta mensagem de ajuda"),
     ]
     await application.bot.set_my_commands(commands)
+    await banco.iniciar()
+    if METRICAS_PORTA:
+        await servidor_metricas.iniciar()
     print("Lista de comandos configurada no Telegram!")
 
 
+async def post_shutdown(application: Application):
+    """Fecha a conexão com o serviço de busca, o banco e o endpoint de métricas ao encerrar o bot."""
+    await servidor_metricas.encerrar()
+    await cliente_busca.fechar()
+    await banco.fechar()
+
+
 # --- FUNÇÃO PRINCIPAL ---
 def main():
     """Função principal que inicia o bot."""
@@ -273,19 +221,22 @@ def main():
         print("ERRO CRÍTICO: A variável de ambiente TELEGRAM_TOKEN não foi configurada.")
         return
 
-    iniciar_banco_de_dados()
-
     # ALTERADO: Adiciona a função post_init ao builder para configurar os comandos na inicialização
-    application = Application.builder().token(TOKEN).post_init(post_init).build()
-
-    # Registra todos os handlers (comandos, botões, etc.)
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("ajuda", ajuda))
-    application.add_handler(CommandHandler("explorar_ti", explorar_ti))
-    application.add_handler(CommandHandler("pesquisar_cursos", pesquisar_cursos))
-    application.add_handler(CommandHandler("cursos_pentest", cursos_pentest))
-    application.add_handler(CommandHandler("meus_cursos", meus_cursos))
-    application.add_handler(CallbackQueryHandler(button_callback_handler))
+    # concurrent_updates: uma busca demorada não impede que outros usuários sejam atendidos
+    application = (
+        Application.builder().token(TOKEN)
+        .post_init(post_init).post_shutdown(post_shutdown)
+        .concurrent_updates(True)
+        .build()
+    )
+
+    # Registra todos os handlers (comandos, botões, etc.), cada um com a duração medida
+    for nome, handler in (
+        ("start", start), ("ajuda", ajuda), ("explorar_ti", explorar_ti),
+        ("pesquisar_cursos", pesquisar_cursos), ("cursos_pentest", cursos_pentest), ("meus_cursos", meus_cursos),
+    ):
+        application.add_handler(CommandHandler(nome, medir_comando("telegram", nome)(handler)))
+    application.add_handler(CallbackQueryHandler(medir_comando("telegram", "botao")(button_callback_handler)))
 
     print("Bot do Telegram iniciado. Pressione Ctrl+C para parar.")
     application.run_polling()